@@ -1,7 +1,6 @@
 import pandas as pd
 import streamlit as st
-import altair as alt
-from utils import set_db_connection
+from helper import dataset, holdings, member_index, result_cache, s3_cache, selection_index, tables, timing
 
 # Set page configuration
 st.set_page_config(
@@ -9,8 +8,13 @@ st.set_page_config(
     initial_sidebar_state="auto",  # Automatically determine the initial state of the sidebar
 )
 
-# Set DB Connection
-s3 = set_db_connection()
+
+@st.cache_resource
+def get_s3():
+    # Set DB Connection: once per process rather than on every script run
+    from utils import set_db_connection
+    return set_db_connection()
+
 
 # Session State
 if 'submitted' not in st.session_state:
@@ -21,60 +25,99 @@ if 'ticker' not in st.session_state:
     st.session_state['ticker'] = ''
 if 'date' not in st.session_state:
     st.session_state['date'] = ''
-
-
-# Load data with cache
-@st.cache_data
+if 'relevant_info' not in st.session_state:
+    st.session_state['relevant_info'] = ''
+
+
+S3_OBJECTS = {
+    'transactions': 'transactions/transactions.csv',
+    'committee_assignments': 'assignments/committee_assignments_of_interest.csv',
+    'subcommittee_assignments': 'assignments/subcommittee_assignments_of_interest.csv',
+    'committees': 'committees/committees.csv',
+    'subcommittees': 'subcommittees/subcommittees.csv',
+    'bills': 'bills/member_bills.csv',
+    'committee_hearings': 'hearings/committee_hearings.csv',
+    'travel': 'travel/private_travel.csv',
+    'related_bills': 'bills/related_bills.csv',
+    'member_statements': 'statements/member_statements.csv',
+}
+TABLE_OF = {key: name for name, key in S3_OBJECTS.items()}
+
+# Columns read by this view, per table
+COLUMNS = {
+    'transactions': ['id', 'display_name', 'congress', 'ticker', 'asset_description', 'type', 'amount',
+                     'amount_formatted', 'industry', 'sector', 'state', 'combined_transaction_date',
+                     'disclosure_date', 'ptr_link'],
+    'committee_assignments': ['member_id', 'congress', 'committee_id'],
+    'subcommittee_assignments': ['member_id', 'congress', 'subcommittee_id'],
+    'committees': ['committee_id', 'committee_name', 'congress', 'chamber'],
+    'subcommittees': ['subcommittee_id', 'subcommittee_name', 'congress', 'chamber'],
+    'bills': ['member_id', 'bill_id', 'bill_title', 'bill_intro_date', 'bill_summary', 'bill_url'],
+    'committee_hearings': ['hearing_committee_id', 'hearing_congress', 'hearing_date', 'hearing_description'],
+    'travel': ['member_id', 'congress', 'departure_date', 'destination', 'sponsor'],
+    'related_bills': ['member_id', 'bill_congress', 'related_bill_id', 'related_bill_title',
+                      'related_bill_introduction_date'],
+    'member_statements': ['member_id', 'congress', 'type', 'date', 'title', 'url'],
+}
+
+# Columns relevant_info looks rows up by, per table
+INDEX_KEYS = {
+    'committee_assignments': ['member_id', 'congress'],
+    'subcommittee_assignments': ['member_id', 'congress'],
+    'committees': ['committee_id', 'congress'],
+    'subcommittees': ['subcommittee_id', 'congress'],
+    'bills': ['member_id'],
+    'committee_hearings': ['hearing_committee_id', 'hearing_congress'],
+    'travel': ['member_id', 'congress'],
+    'related_bills': ['member_id', 'bill_congress'],
+    'member_statements': ['member_id', 'congress'],
+    'holdings_by_ticker': ['display_name'],
+    'holdings_by_industry': ['display_name'],
+    'positions_over_time': ['display_name', 'ticker'],
+}
+
+
+# Load data with cache: cache_resource hands every session the same object instead of an unpickled copy
+# each, as in local.py and demo.py; its tables are read-only to the views
+@st.cache_resource
 def load_data():
-    bucket = s3.Bucket('mids-capstone')
-    transactions_obj = bucket.Object('transactions/transactions.csv').get()
-    committee_assignments_obj = bucket.Object('assignments/committee_assignments_of_interest.csv').get()
-    subcommittee_assignments_obj = bucket.Object('assignments/subcommittee_assignments_of_interest.csv').get()
-    committees_obj = bucket.Object('committees/committees.csv').get()
-    subcommittees_obj = bucket.Object('subcommittees/subcommittees.csv').get()
-    bills_obj = bucket.Object('bills/member_bills.csv').get()
-    committee_hearings_obj = bucket.Object('hearings/committee_hearings.csv').get()
-    travel_obj = bucket.Object('travel/private_travel.csv').get()
-    related_bills_obj = bucket.Object('bills/related_bills.csv').get()
-    member_statements_obj = bucket.Object('statements/member_statements.csv').get()
-
-    return {
-        'transactions': pd.read_csv(transactions_obj['Body']),
-        'committee_assignments': pd.read_csv(committee_assignments_obj['Body']),
-        'subcommittee_assignments': pd.read_csv(subcommittee_assignments_obj['Body']),
-        'committees': pd.read_csv(committees_obj['Body']),
-        'subcommittees': pd.read_csv(subcommittees_obj['Body']),
-        'bills': pd.read_csv(bills_obj['Body']),
-        'committee_hearings': pd.read_csv(committee_hearings_obj['Body']),
-        'travel': pd.read_csv(travel_obj['Body']),
-        'related_bills': pd.read_csv(related_bills_obj['Body']),
-        'member_statements': pd.read_csv(member_statements_obj['Body'])
-    }
+    # Objects are fetched (through the on-disk ETag cache) and parsed concurrently, one worker per object
+    with timing.span('load_data.tables') as span:
+        frames, _ = s3_cache.load_objects(get_s3().meta.client, 'mids-capstone', S3_OBJECTS.values(),
+                                          lambda key, path: dataset.typed(pd.read_csv(path, usecols=dataset.usecols(COLUMNS[TABLE_OF[key]])), TABLE_OF[key]))
+        data = {name: frames[key] for name, key in S3_OBJECTS.items()}
+        span.rows = sum(len(df) for df in data.values())
+    with timing.span('load_data.holdings', len(data['transactions'])):
+        data.update(holdings.build_holdings(data['transactions']))
+    with timing.span('load_data.indexes'):
+        data['index'] = member_index.build_indexes(data, INDEX_KEYS, date_keys={})
+        data['selection'] = selection_index.build_selection_index(data['transactions'])
+    data['version'] = dataset.dataset_version(s3_cache.etags('mids-capstone', S3_OBJECTS.values()))
+    return data
 
 
 def transactions_selection(data):
     # data
     transactions = data['transactions']
+    selection = data['selection']
 
     politician, ticker, date, submit = st.columns([0.305, 0.305, 0.305, 0.085])
     with politician:
-        politician_options = transactions['display_name'].dropna().unique().tolist()
+        politician_options = list(selection)
         politician_selection = st.selectbox('(1) Select Politician:', politician_options)
-        filtered_df = transactions[transactions['display_name'] == politician_selection]
         if st.session_state['politician'] != politician_selection:
             st.session_state['politician'] = politician_selection
             st.session_state['submitted'] = False
     with ticker:
-        ticker_options = filtered_df['ticker'].dropna().unique().tolist()
+        ticker_options = list(selection[politician_selection])
         ticker_selection = st.selectbox('(2) Select Transaction Ticker:', ticker_options)
-        filtered_df = filtered_df[filtered_df['ticker'] == ticker_selection]
         if st.session_state['ticker'] != ticker_selection:
             st.session_state['ticker'] = ticker_selection
             st.session_state['submitted'] = False
     with date:
-        transaction_date_options = filtered_df['combined_transaction_date'].dropna().unique().tolist()
-        transaction_date_selection = st.selectbox('(3) Select Transaction Date:', transaction_date_options)
-        filtered_df = filtered_df[filtered_df['combined_transaction_date'] == transaction_date_selection]
+        transaction_date_options = list(selection[politician_selection][ticker_selection])
+        transaction_date_selection = st.selectbox('(3) Select Transaction Date:', transaction_date_options, format_func=lambda d: d.strftime('%Y-%m-%d'))
+        filtered_df = transactions.iloc[selection[politician_selection][ticker_selection][transaction_date_selection]]
         if st.session_state['date'] != transaction_date_selection:
             st.session_state['date'] = transaction_date_selection
             st.session_state['submitted'] = False
@@ -90,9 +133,8 @@ def transactions_selection(data):
     placeholder3_title = st.empty()
     placeholder3_body = st.empty()
     if not (st.session_state['submitted'] or submitted):
-        cumulative_df = cumulative(transactions, politician_selection)
-        politician_graph(placeholder1_title, placeholder1_body, placeholder2_title, placeholder2_body, cumulative_df, politician_selection)
-        politician_ticker_graph(placeholder3_title, placeholder3_body, cumulative_df, politician_selection, ticker_selection)
+        politician_graph(placeholder1_title, placeholder1_body, placeholder2_title, placeholder2_body, data, politician_selection)
+        politician_ticker_graph(placeholder3_title, placeholder3_body, data, politician_selection, ticker_selection)
     
         
     if submitted or st.session_state['submitted']:
@@ -109,19 +151,19 @@ def transactions_selection(data):
 
         generate_relevant_info = st.button('Generate Relevant Info')
         if generate_relevant_info:
+            st.session_state['relevant_info'] = f'{politician_id}_{politician_congress}'
+        # Stays open across reruns (paging, expanders) until another politician is picked
+        if st.session_state['relevant_info'] == f'{politician_id}_{politician_congress}':
             relevant_info(data, politician_selection, politician_id, politician_congress)
 
 
-def cumulative(transactions, politician_selection):
-    filtered = transactions[(transactions['display_name'] == politician_selection) & (transactions['type'] != 'exchange')].sort_values(by=['combined_transaction_date'])
-    filtered['actual_amount'] = filtered.apply(lambda row: row['amount_formatted'] if row['type']=='purchase' else -row['amount_formatted'], axis=1)
-    filtered['cumulative_amount'] = filtered.groupby('ticker')['actual_amount'].cumsum()
-    test = filtered[filtered['ticker']=='CNC'][['ticker', 'combined_transaction_date', 'type', 'amount_formatted', 'actual_amount', 'cumulative_amount']]
-    return filtered
-    
+def politician_graph(placeholder1_title, placeholder1_body, placeholder2_title, placeholder2_body, data, politician):
+    import altair as alt
 
-def politician_graph(placeholder1_title, placeholder1_body, placeholder2_title, placeholder2_body, transactions, politician):
-    portfolio_value = transactions.groupby('ticker').last().reset_index()
+    with timing.span('politician_graph.select') as span:
+        portfolio_value = member_index.select(data, 'holdings_by_ticker', [politician])
+        industry_bar_chart_data = member_index.select(data, 'holdings_by_industry', [politician])
+        span.rows = len(portfolio_value) + len(industry_bar_chart_data)
 
     bar_chart = alt.Chart(portfolio_value).mark_bar().encode(
         x=alt.X('ticker:N', title='Ticker'),
@@ -138,7 +180,6 @@ def politician_graph(placeholder1_title, placeholder1_body, placeholder2_title,
             alt.Tooltip('sector', title='Sector')]
     ).interactive()
 
-    industry_bar_chart_data = portfolio_value.fillna("No Industry").groupby('industry').sum('cumulative_amount').reset_index()
     industry_bar_chart = alt.Chart(industry_bar_chart_data).mark_bar().encode(
         x=alt.X('industry', title='Industry'),
         y=alt.Y('cumulative_amount', title='Amount ($)'),
@@ -151,22 +192,27 @@ def politician_graph(placeholder1_title, placeholder1_body, placeholder2_title,
             alt.Tooltip('cumulative_amount', title='Amount ($)')]
     ).interactive()
 
-    placeholder1_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s Estimated Net Holdings At Present by Ticker</h1>", unsafe_allow_html=True)
-    placeholder1_body.altair_chart(bar_chart, use_container_width=True)
-    placeholder2_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s Estimated Net Holdings At Present by Industry</h1>", unsafe_allow_html=True)
-    placeholder2_body.altair_chart(industry_bar_chart, use_container_width=True)
+    with timing.span('politician_graph.render'):
+        placeholder1_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s Estimated Net Holdings At Present by Ticker</h1>", unsafe_allow_html=True)
+        placeholder1_body.altair_chart(bar_chart, use_container_width=True)
+        placeholder2_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s Estimated Net Holdings At Present by Industry</h1>", unsafe_allow_html=True)
+        placeholder2_body.altair_chart(industry_bar_chart, use_container_width=True)
     
 
 
-def politician_ticker_graph(placeholder3_title, placeholder3_body, transactions, politician, ticker):
-    transactions = transactions[transactions['ticker'] == ticker].groupby('combined_transaction_date').last().reset_index()
+def politician_ticker_graph(placeholder3_title, placeholder3_body, data, politician, ticker):
+    import altair as alt
 
-    line_chart = alt.Chart(transactions).mark_line(color='#AED6E8').encode(
+    with timing.span('politician_ticker_graph.select') as span:
+        positions = member_index.select(data, 'positions_over_time', [(politician, ticker)])
+        span.rows = len(positions)
+
+    line_chart = alt.Chart(positions).mark_line(color='#AED6E8').encode(
         x=alt.X('combined_transaction_date:T', title='Date'),
         y=alt.Y('cumulative_amount:Q', title='Position ($)')
     ).interactive()
 
-    circle_chart = alt.Chart(transactions).mark_circle(size=75, color='#F9ACB1').encode(
+    circle_chart = alt.Chart(positions).mark_circle(size=75, color='#F9ACB1').encode(
         x=alt.X('combined_transaction_date:T', title='Date'), 
         y=alt.Y('cumulative_amount:Q', title='Position ($)'),
         tooltip=[
@@ -176,94 +222,111 @@ def politician_ticker_graph(placeholder3_title, placeholder3_body, transactions,
 
     line = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(strokeDash=[2, 2], color='white').encode(y='y')
 
-    placeholder3_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s {ticker} Position Over Time</h1>", unsafe_allow_html=True)
-    placeholder3_body.altair_chart(line_chart + circle_chart + line, use_container_width=True)
+    with timing.span('politician_ticker_graph.render'):
+        placeholder3_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s {ticker} Position Over Time</h1>", unsafe_allow_html=True)
+        placeholder3_body.altair_chart(line_chart + circle_chart + line, use_container_width=True)
 
 
-def relevant_info(data, politician_selection, politician_id, politician_congress):
-    # data
-    committee_assignments = data['committee_assignments']
-    subcommittee_assignments = data['subcommittee_assignments']
-    committees = data['committees']
-    subcommittees = data['subcommittees']
-    bills = data['bills']
-    committee_hearings = data['committee_hearings']
-    travel = data['travel']
-    related_bills = data['related_bills']
-    member_statements = data['member_statements']
+@st.cache_resource
+def get_result_cache():
+    cache = result_cache.ResultCache()
+    timing.register_cache('relevant_activity', cache)
+    return cache
+
+
+def relevant_activity(data, politician_id, politician_congress):
+    # Activity tables of a politician and congress, built once per dataset version and shared by all sessions
+    key = (data['version'], politician_id, politician_congress)
+    return get_result_cache().get(key, lambda: filter_activity(data, politician_id, politician_congress))
+
+
+def filter_activity(data, politician_id, politician_congress):
+    politician_committees = member_index.select(data, 'committee_assignments', [(politician_id, politician_congress)])['committee_id'].values
+    politician_subcommittees = member_index.select(data, 'subcommittee_assignments', [(politician_id, politician_congress)])['subcommittee_id'].values
+
+    filtered_committees = member_index.select(data, 'committees', [(committee_id, politician_congress) for committee_id in politician_committees])[['committee_id', 'committee_name', 'congress', 'chamber']]
+    filtered_committees.columns = ['Committee ID', 'Committee Name', 'Congress', 'Chamber']
+
+    filtered_subcommittees = member_index.select(data, 'subcommittees', [(subcommittee_id, politician_congress) for subcommittee_id in politician_subcommittees])[['subcommittee_id', 'subcommittee_name', 'congress', 'chamber']]
+    filtered_subcommittees.columns = ['Subcommittee ID', 'Subcommittee Name', 'Congress', 'Chamber']
+
+    filtered_bills = member_index.select(data, 'bills', [politician_id])[['bill_id', 'bill_title', 'bill_intro_date', 'bill_summary', 'bill_url']]
+    filtered_bills.columns = ['Bill ID', 'Bill Title', 'Bill Intro Date', 'Bill Summary', 'Bill Link']
+
+    politician_committees = filtered_committees['Committee ID'].values
+    filtered_hearings = member_index.select(data, 'committee_hearings', [(committee_id, politician_congress) for committee_id in politician_committees])[['hearing_date', 'hearing_description']]
+    filtered_hearings.columns = ['Hearing Date', 'Hearing Description']
+
+    filtered_travel = member_index.select(data, 'travel', [(politician_id, politician_congress)])[['departure_date', 'destination', 'sponsor']]
+    filtered_travel.columns = ['Departure Date', 'Destination', 'Sponsor']
+
+    filtered_related_bills = member_index.select(data, 'related_bills', [(politician_id, politician_congress)])[['related_bill_id', 'related_bill_title', 'related_bill_introduction_date']]
+    filtered_related_bills.columns = ['Related Bill ID', 'Related Bill Title', 'Related Bill Introduction Date']
 
+    filtered_statements = member_index.select(data, 'member_statements', [(politician_id, politician_congress)])[['type', 'date', 'title', 'url']]
+    filtered_statements.columns = ['Type', 'Date', 'Title', 'Statement Link']
+
+    return {'committees': filtered_committees, 'subcommittees': filtered_subcommittees, 'bills': filtered_bills,
+            'hearings': filtered_hearings, 'travel': filtered_travel, 'related_bills': filtered_related_bills,
+            'statements': filtered_statements}
+
+
+def relevant_info(data, politician_selection, politician_id, politician_congress):
+    info_key = f'{politician_id}_{politician_congress}'
     st.subheader('', divider='blue')
 
-    politician_committees = committee_assignments[(committee_assignments['member_id'] == politician_id) & (committee_assignments['congress'] == politician_congress)]['committee_id'].values
-    politician_subcommittees = subcommittee_assignments[(subcommittee_assignments['member_id'] == politician_id) & (subcommittee_assignments['congress'] == politician_congress)]['subcommittee_id'].values
+    activity = relevant_activity(data, politician_id, politician_congress)
 
     # Display Politician's Committee Assignments:
     st.write(f'**{politician_selection}\'s Committee Assignments:**')
-    filtered_committees = committees[(committees['committee_id'].isin(politician_committees)) & (committees['congress'] == politician_congress)][['committee_id', 'committee_name', 'congress', 'chamber']]
-    filtered_committees.columns = ['Committee ID', 'Committee Name', 'Congress', 'Chamber']
-    if len(filtered_committees) == 0:
+    if len(activity['committees']) == 0:
         st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant committee assignments</em></div> <br>', unsafe_allow_html=True)
     else:
-        st.data_editor(filtered_committees, hide_index=True)
+        tables.paginated_table(activity['committees'], f'{info_key}_committees', text_columns=['Committee Name'])
 
     # Display Politician's Subcommittee Assignments:
     st.write(f'**{politician_selection}\'s Subcommittee Assignments:**')
-    filtered_subcommittees = subcommittees[(subcommittees['subcommittee_id'].isin(politician_subcommittees)) & (subcommittees['congress'] == politician_congress)][['subcommittee_id', 'subcommittee_name', 'congress', 'chamber']]
-    filtered_subcommittees.columns = ['Subcommittee ID', 'Subcommittee Name', 'Congress', 'Chamber']
-    if len(filtered_subcommittees) == 0:
+    if len(activity['subcommittees']) == 0:
         st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant subcommittee assignments</em></div> <br>', unsafe_allow_html=True)
     else:
-        st.data_editor(filtered_subcommittees, hide_index=True)
+        tables.paginated_table(activity['subcommittees'], f'{info_key}_subcommittees', text_columns=['Subcommittee Name'])
 
     # Display Politician's Bills
     st.write(f'**{politician_selection}\'s Bills:**')
-    filtered_bills = bills[bills['member_id'] == politician_id][['bill_id', 'bill_title', 'bill_intro_date', 'bill_summary', 'bill_url']]
-    filtered_bills.columns = ['Bill ID', 'Bill Title', 'Bill Intro Date', 'Bill Summary', 'Bill Link']
-    if len(filtered_bills) == 0:
+    if len(activity['bills']) == 0:
         st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant bills</em></div> <br>', unsafe_allow_html=True)
     else:
-        st.data_editor(filtered_bills,
-            column_config={"Bill Link": st.column_config.LinkColumn()}, 
-            hide_index=True)
+        tables.paginated_table(activity['bills'], f'{info_key}_bills', text_columns=['Bill Title', 'Bill Summary'],
+            column_config={"Bill Link": st.column_config.LinkColumn()})
 
     # Display Politician's Hearings
     st.write(f'**{politician_selection}\'s Hearings:**')
-    politician_committees = filtered_committees['Committee ID'].values
-    filtered_hearings = committee_hearings[(committee_hearings['hearing_committee_id'].isin(politician_committees)) & (committee_hearings['hearing_congress'] == politician_congress)][['hearing_date', 'hearing_description']]
-    filtered_hearings.columns = ['Hearing Date', 'Hearing Description']
-    if len(filtered_hearings) == 0:
+    if len(activity['hearings']) == 0:
         st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant hearings</em></div> <br>', unsafe_allow_html=True)
     else:
-        st.data_editor(filtered_hearings, hide_index=True)
+        tables.paginated_table(activity['hearings'], f'{info_key}_hearings', text_columns=['Hearing Description'])
 
     # Display Politician's Travel
     st.write(f'**{politician_selection}\'s Travel:**')
-    filtered_travel = travel[(travel['member_id'] == politician_id) & (travel['congress'] == politician_congress)][['departure_date', 'destination', 'sponsor']]
-    filtered_travel.columns = ['Departure Date', 'Destination', 'Sponsor']
-    if len(filtered_travel) == 0:
+    if len(activity['travel']) == 0:
         st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant travel</em></div> <br>', unsafe_allow_html=True)
     else:
-        st.data_editor(filtered_travel, hide_index=True)
+        tables.paginated_table(activity['travel'], f'{info_key}_travel', text_columns=['Destination', 'Sponsor'])
 
     # Display Politician's Related Bills
     st.write(f'**{politician_selection}\'s Related Bills:**')
-    filtered_related_bills = related_bills[(related_bills['member_id'] == politician_id) & (related_bills['bill_congress'] == politician_congress)][['related_bill_id', 'related_bill_title', 'related_bill_introduction_date']]
-    filtered_related_bills.columns = ['Related Bill ID', 'Related Bill Title', 'Related Bill Introduction Date']
-    if len(filtered_related_bills) == 0:
+    if len(activity['related_bills']) == 0:
         st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant related bills</em></div> <br>', unsafe_allow_html=True)
     else:
-        st.data_editor(filtered_related_bills, hide_index=True)
+        tables.paginated_table(activity['related_bills'], f'{info_key}_related_bills', text_columns=['Related Bill Title'])
 
     # Display Politician's Statements
     st.write(f'**{politician_selection}\'s Statements:**')
-    filtered_statements = member_statements[(member_statements['member_id'] == politician_id) & (member_statements['congress'] == politician_congress)][['type', 'date', 'title', 'url']]
-    filtered_statements.columns = ['Type', 'Date', 'Title', 'Statement Link']
-    if len(filtered_statements) == 0:
+    if len(activity['statements']) == 0:
         st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant statements</em></div> <br>', unsafe_allow_html=True)
     else:
-        st.data_editor(filtered_statements,
-            column_config={"Statement Link": st.column_config.LinkColumn()}, 
-            hide_index=True)
+        tables.paginated_table(activity['statements'], f'{info_key}_statements', text_columns=['Title'],
+            column_config={"Statement Link": st.column_config.LinkColumn()})
 
 
 
@@ -282,10 +345,12 @@ def footer():
 
 
 def main():
+    timing.start_trace()
     data = load_data()
     st.title('PoliWatch :flag-us:')
     st.subheader('U.S. Congressional Securities Transactions', divider='red')
     transactions_selection(data)
+    timing.sidebar()
 
 if __name__ == "__main__":
     main()
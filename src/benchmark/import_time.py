@@ -0,0 +1,75 @@
+# Cold-start import budget of the Streamlit scripts: what each module-level import costs a fresh process
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = ['local.py', 'demo.py', 'app.py', 'multiselect.py']
+
+# imported at the point of use: timed separately to show what a session pays when it gets there
+DEFERRED = ['altair', 'pygwalker.api.streamlit', 'streamlit_book', 'PIL', 'boto3', 'botocore.exceptions', 'sklearn.metrics.pairwise']
+
+
+def top_level_imports(path):
+    """
+    The module-level import statements of a script, as source lines, in order.
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def import_times(statements):
+    """
+    {statement: seconds} for statements run in order in one fresh interpreter, each paying only
+    for the modules not already imported by an earlier one; None when it fails (module missing).
+    """
+    lines = ['import json, time', 'times = []']
+    for statement in statements:
+        lines += ['start = time.perf_counter()', 'try:', f'    {statement}', '    times.append(time.perf_counter() - start)',
+                  'except Exception:', '    times.append(None)']
+    lines.append('print(json.dumps(times))')
+    result = subprocess.run([sys.executable, '-c', '\n'.join(lines)], cwd=SRC_DIR, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': SRC_DIR}, check=True)
+    return dict(zip(statements, json.loads(result.stdout.splitlines()[-1])))
+
+
+def report(scripts=SCRIPTS, deferred=DEFERRED):
+    """
+    One JSON-ready row per script import (seconds, None when the module is missing), a total per
+    script, and the standalone cost of each deferred dependency.
+    """
+    rows = []
+    for script in scripts:
+        statements = top_level_imports(os.path.join(SRC_DIR, script))
+        times = import_times(statements)
+        for statement, seconds in times.items():
+            rows.append({'script': script, 'import': statement, 'seconds': seconds})
+        rows.append({'script': script, 'import': 'total', 'seconds': sum(seconds or 0 for seconds in times.values())})
+    for module in deferred:
+        seconds = import_times([f'import {module}'])[f'import {module}']
+        rows.append({'script': 'deferred', 'import': module, 'seconds': seconds})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import-time report of the PoliWatch scripts')
+    parser.add_argument('scripts', nargs='*', default=SCRIPTS)
+    parser.add_argument('--json', action='store_true', help='JSON lines instead of a table')
+    args = parser.parse_args(argv)
+    for row in report(args.scripts):
+        if args.json:
+            print(json.dumps(row))
+        else:
+            seconds = 'missing' if row['seconds'] is None else f'{row["seconds"] * 1000:9.1f} ms'
+            print(f'{row["script"]:15} {seconds:>12}  {row["import"]}')
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m benchmark.import_time [scripts ...] [--json]
+    main()
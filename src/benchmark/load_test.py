@@ -0,0 +1,132 @@
+# Throughput / latency load test of the query service (helper.service), on a synthetic dataset or a running server
+
+import argparse
+import contextlib
+import http.client
+import json
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+from benchmark import run
+from helper import loader, service
+
+# endpoint -> share of requests
+MIX = {'activity': 0.6, 'transactions': 0.2, 'holdings': 0.2}
+
+# status recorded for a request that got no response (refused, reset, timed out, malformed); counted as an error
+CLIENT_ERROR = 599
+
+
+def get(connection, path):
+    connection.request('GET', path)
+    response = connection.getresponse()
+    body = response.read()
+    return response.status, body
+
+
+def targets(connection, politicians=20):
+    """
+    Politicians and transaction uuids to query, fetched from the service itself.
+    """
+    names = json.loads(get(connection, '/politicians')[1])['politicians'][:politicians]
+    uuids = []
+    for name in names:
+        status, body = get(connection, '/transactions?' + urllib.parse.urlencode({'politician': name}))
+        uuids.extend(row['uuid'] for row in json.loads(body))
+    return names, uuids
+
+
+def request_paths(names, uuids, n, fmt='json', seed=0):
+    rng = np.random.default_rng(seed)
+    endpoints = rng.choice(list(MIX), n, p=list(MIX.values()))
+    paths = []
+    for endpoint in endpoints:
+        if endpoint == 'activity':
+            query = {'uuid': uuids[rng.integers(len(uuids))], 'top_k': 10}
+            if fmt == 'arrow':
+                query.update(tables='statements', format='arrow')
+        else:
+            query = {'politician': names[rng.integers(len(names))]}
+            if fmt == 'arrow':
+                query['format'] = 'arrow'
+        paths.append((endpoint, f'/{endpoint}?' + urllib.parse.urlencode(query)))
+    return paths
+
+
+def client(host, port, paths, results):
+    # one keep-alive connection per client, as a tool polling the service would hold; reopened after a failure
+    connection = http.client.HTTPConnection(host, port)
+    for endpoint, path in paths:
+        start = time.perf_counter()
+        try:
+            status, _ = get(connection, path)
+        except (OSError, http.client.HTTPException):
+            status = CLIENT_ERROR
+            connection.close()
+            connection = http.client.HTTPConnection(host, port)
+        results.append((endpoint, time.perf_counter() - start, status))
+    connection.close()
+
+
+def summary(name, latencies, statuses, seconds, **extra):
+    latencies = np.asarray(latencies) * 1000
+    return {'endpoint': name, 'requests': len(latencies), 'errors': int(sum(status >= 500 for status in statuses)),
+            'not_found': int(sum(status == 404 for status in statuses)), 'throughput': len(latencies) / seconds,
+            'p50_ms': float(np.percentile(latencies, 50)), 'p95_ms': float(np.percentile(latencies, 95)),
+            'p99_ms': float(np.percentile(latencies, 99)), 'max_ms': float(latencies.max()), **extra}
+
+
+def load_test(host, port, clients=8, requests=200, fmt='json', seed=0):
+    """
+    `clients` concurrent connections sending `requests` requests each; one result per endpoint and one overall.
+    """
+    connection = http.client.HTTPConnection(host, port)
+    names, uuids = targets(connection)
+    connection.close()
+    workloads = [request_paths(names, uuids, requests, fmt, seed + i) for i in range(clients)]
+    results = []
+    threads = [threading.Thread(target=client, args=(host, port, paths, results)) for paths in workloads]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    extra = {'clients': clients, 'format': fmt}
+    summaries = [summary(endpoint, [latency for name, latency, _ in results if name == endpoint],
+                         [status for name, _, status in results if name == endpoint], seconds, **extra)
+                 for endpoint in MIX if any(name == endpoint for name, _, _ in results)]
+    summaries.append(summary('all', [latency for _, latency, _ in results], [status for _, _, status in results], seconds, **extra))
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test of the PoliWatch query service')
+    parser.add_argument('--url', help='running service, e.g. http://127.0.0.1:8502 (default: serve a synthetic dataset in-process)')
+    parser.add_argument('--scale', type=int, default=1, help='synthetic dataset scale when no --url is given')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--format', choices=['json', 'arrow'], default='json')
+    args = parser.parse_args(argv)
+
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        with contextlib.redirect_stdout(sys.stderr):
+            _, store_dir = run.prepare(args.scale, 64, 0)
+            server = service.make_server(service.QueryService(loader.load_data(store_dir)), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+    for clients in args.clients:
+        for result in load_test(host, port, clients, args.requests, args.format):
+            print(json.dumps({**result, 'scale': None if args.url else args.scale}), flush=True)
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m benchmark.load_test [--url http://host:port] [--scale 1] [--clients 1 4 16] [--format arrow]
+    main()
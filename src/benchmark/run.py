@@ -0,0 +1,199 @@
+# Timed scenarios over the hot paths of the Streamlit views, on synthetic datasets at several scales
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmark import synthetic
+from helper import dataset, embeddings, filtering, holdings, loader, member_index, scoring, selection_index
+
+BENCHMARK_DIR = os.environ.get('POLIWATCH_BENCHMARK_DIR', 'benchmark_data')
+
+# lookups timed per repeat by the per-interaction scenarios
+SAMPLES = 50
+
+
+def prepare(scale, dim, seed, root=BENCHMARK_DIR):
+    """
+    Generated csv dataset for a scale (reused across runs) and a built parquet / npy store beside it.
+    Returns (csv dir, store dir).
+    """
+    base = os.path.join(root, f'scale{scale}_dim{dim}_seed{seed}')
+    csv_dir, store_dir = os.path.join(base, 'csv'), os.path.join(base, 'store')
+    if not os.path.exists(os.path.join(csv_dir, 'complete')):
+        shutil.rmtree(base, ignore_errors=True)
+        synthetic.write_dataset(csv_dir, scale, dim=dim, seed=seed, shards=4)
+        open(os.path.join(csv_dir, 'complete'), 'w').close()
+    if not os.path.exists(os.path.join(store_dir, 'embeddings')):
+        shutil.copytree(csv_dir, store_dir, ignore=shutil.ignore_patterns('complete'), dirs_exist_ok=True)
+        dataset.build_dataset(store_dir)
+    return csv_dir, store_dir
+
+
+def sample_transactions(data, n=SAMPLES, seed=0):
+    rng = np.random.default_rng(seed)
+    return data['transactions'].iloc[np.sort(rng.choice(len(data['transactions']), min(n, len(data['transactions'])), replace=False))]
+
+
+def politician_graph(data, politicians):
+    for politician in politicians:
+        by_ticker = member_index.select(data, 'holdings_by_ticker', [politician])
+        member_index.select(data, 'holdings_by_industry', [politician])
+        if len(by_ticker):
+            member_index.select(data, 'positions_over_time', [(politician, by_ticker['ticker'].iloc[0])])
+
+
+def cascade(data, politicians):
+    # politician -> ticker -> date selectors, as transactions_selection walks them
+    transactions, selection = data['transactions'], data['selection']
+    for politician in politicians:
+        tickers = selection[politician]
+        dates = tickers[next(iter(tickers))]
+        transactions.iloc[dates[next(iter(dates))]]
+
+
+def multiselect(data, postings, politicians):
+    # multiselect.py: options and first page for growing politician selections
+    transactions = data['transactions']
+    for i in range(1, len(politicians) + 1):
+        selections = {'display_name': politicians[:i]}
+        positions = filtering.resolve(postings, selections)
+        filtering.options(transactions, postings, 'ticker', positions)
+        filtering.page(transactions, positions, 0, 20)
+
+
+def relevant_info(data, uuids, lookback_days=None, k=None, threshold=None):
+    # every category of each transaction, as the relevant_info radio pages through them
+    for uuid in uuids:
+        for category in scoring.CATEGORIES:
+            scoring.category_activity(data, uuid, category, lookback_days, k, threshold)
+
+
+def scenarios(csv_dir, store_dir):
+    """
+    {scenario: (rows it works on, callable)}; data-dependent scenarios run over the built store.
+    """
+    data = loader.load_data(store_dir)
+    transactions = data['transactions']
+    sample = sample_transactions(data)
+    politicians = list(data['selection'])[:SAMPLES]
+    postings = filtering.build_postings(transactions, ['display_name', 'ticker', 'combined_transaction_date'])
+    activity_rows = sum(len(data[name]) for name in embeddings.EMBEDDING_TABLES)
+    return {
+        'load_data_csv': (activity_rows, lambda: loader.load_data(csv_dir)),
+        'build_store': (activity_rows, lambda: dataset.build_dataset(store_dir)),
+        'load_data_store': (activity_rows, lambda: loader.load_data(store_dir)),
+        'cumulative_positions': (len(transactions), lambda: holdings.cumulative_positions(transactions)),
+        'build_holdings': (len(transactions), lambda: holdings.build_holdings(transactions)),
+        'build_indexes': (activity_rows, lambda: member_index.build_indexes(data)),
+        'politician_graph': (len(politicians), lambda: politician_graph(data, politicians)),
+        'build_selection_index': (len(transactions), lambda: selection_index.build_selection_index(transactions)),
+        'transactions_selection': (len(politicians), lambda: cascade(data, politicians)),
+        'build_postings': (len(transactions), lambda: filtering.build_postings(transactions, ['display_name', 'ticker', 'combined_transaction_date'])),
+        'multiselect_filter': (len(politicians[:10]), lambda: multiselect(data, postings, politicians[:10])),
+        'relevant_info': (len(sample), lambda: relevant_info(data, sample['uuid'], k=10)),
+        'relevant_info_90d': (len(sample), lambda: relevant_info(data, sample['uuid'], 90, 10, 0.2)),
+        'score_all': (len(transactions), lambda: scoring.score_all(data)),
+    }
+
+
+class MemoryReport(logging.Handler):
+    """
+    Collects the per-table memory before / after typing that helper.dataset logs at INFO level.
+    """
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.tables = {}
+
+    def emit(self, record):
+        name, before_mb, after_mb = record.args
+        self.tables[name] = {'before_mb': before_mb, 'after_mb': after_mb}
+
+
+def memory_report(csv_dir):
+    """
+    {table: {before_mb, after_mb}} for one load of the csv dataset: the raw read_csv frame (embedding
+    text included) against the typed table plus its float32 embedding matrix.
+    """
+    handler, level = MemoryReport(), dataset.logger.level
+    dataset.logger.addHandler(handler)
+    dataset.logger.setLevel(logging.INFO)
+    try:
+        loader.load_data(csv_dir, views=False)
+    finally:
+        dataset.logger.removeHandler(handler)
+        dataset.logger.setLevel(level)
+    return handler.tables
+
+
+def measure(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(scales=(1, 10, 100), repeats=3, only=None, dim=64, seed=0, out=None):
+    """
+    Time every scenario (or those named in `only`) at each scale. Each result is one JSON line:
+    scenario, scale, rows, best / median / all timings in seconds, and the environment. The `memory`
+    scenario instead gives one line per table with its memory before and after typing, in MB.
+    """
+    environment = {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__, 'dim': dim, 'seed': seed}
+    results = []
+
+    def emit(result):
+        results.append(result)
+        print(json.dumps(result), flush=True)
+        if out:
+            with open(out, 'a') as f:
+                f.write(json.dumps(result) + '\n')
+
+    for scale in scales:
+        # the loaders' progress output goes to stderr, stdout carries only results
+        with contextlib.redirect_stdout(sys.stderr):
+            csv_dir, store_dir = prepare(scale, dim, seed)
+            cases = scenarios(csv_dir, store_dir)
+        if not only or 'memory' in only:
+            with contextlib.redirect_stdout(sys.stderr):
+                tables = memory_report(csv_dir)
+            for table, memory in tables.items():
+                emit({'scenario': 'memory', 'scale': scale, 'table': table, **memory, **environment})
+        for scenario, (rows, function) in cases.items():
+            if only and scenario not in only:
+                continue
+            with contextlib.redirect_stdout(sys.stderr):
+                timings = measure(function, repeats)
+            emit({'scenario': scenario, 'scale': scale, 'rows': rows, 'best': min(timings),
+                  'median': statistics.median(timings), 'timings': timings, **environment})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PoliWatch benchmarks on synthetic data')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--scenarios', nargs='+', help='only these scenarios (memory: per-table memory before / after typing)')
+    parser.add_argument('--dim', type=int, default=64, help='embedding dimension')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='append results to this JSON lines file')
+    args = parser.parse_args(argv)
+    run(args.scales, args.repeats, args.scenarios, args.dim, args.seed, args.out)
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m benchmark.run [--scales 1 10 100] [--repeats 3] [--scenarios ...] [--out results.jsonl]
+    main()
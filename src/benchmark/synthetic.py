@@ -0,0 +1,187 @@
+# Synthetic PoliWatch dataset: the *_final tables with their real column schemas, written as csv
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from helper import embeddings
+
+# rows per table at scale 1; every count is multiplied by the scale
+BASE_ROWS = {
+    'transactions': 1000,
+    'committee_assignments': 150,
+    'subcommittee_assignments': 300,
+    'statements': 6000,
+    'travel': 300,
+    'related_bills': 1500,
+    'bills': 1500,
+    'hearings': 800,
+}
+
+BASE_MEMBERS = 20
+MAX_MEMBERS = 540
+CONGRESSES = [116, 117, 118]
+TYPES = ['purchase', 'sale_full', 'sale_partial', 'exchange']
+AMOUNTS = {'$1,001 - $15,000': 1001.0, '$15,001 - $50,000': 15001.0, '$50,001 - $100,000': 50001.0,
+           '$100,001 - $250,000': 100001.0, '$250,001 - $500,000': 250001.0, '$1,000,001 - $5,000,000': 1000001.0}
+INDUSTRIES = ['Semiconductors', 'Biotechnology', 'Oil & Gas E&P', 'Banks—Regional', 'Aerospace & Defense',
+              'Software—Infrastructure', 'Utilities—Regulated Electric', 'Drug Manufacturers—General']
+SECTORS = ['Technology', 'Healthcare', 'Energy', 'Financial Services', 'Industrials', 'Utilities']
+STATES = ['CA', 'TX', 'NY', 'FL', 'PA', 'OH', 'GA', 'NC', 'MI', 'VA']
+STATEMENT_TYPES = ['Press Release', 'Statement', 'Op-Ed', 'Letter']
+WORDS = ('act appropriations defense energy health security infrastructure reform tax trade agriculture '
+         'veterans education climate technology banking oversight committee hearing budget').split()
+
+
+class Generator:
+    """
+    Random tables sharing one population of members, committees and tickers, so that member /
+    congress / committee joins in relevant_info find matches the way they do on real data.
+    """
+
+    def __init__(self, scale=1, members=None, dim=64, seed=0):
+        self.scale = scale
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+        n_members = members or min(MAX_MEMBERS, BASE_MEMBERS * scale)
+        self.members = np.array([f'{chr(65 + i % 26)}{i:06d}' for i in range(n_members)])
+        self.names = np.array([f'Member {i} (Synthetic)' for i in range(n_members)])
+        self.committees = np.array([f'HS{chr(65 + i // 26)}{chr(65 + i % 26)}' for i in range(40)])
+        self.subcommittees = np.array([f'{committee}{i:02d}' for committee in self.committees for i in range(1, 4)])
+        self.tickers = np.array([''.join(chr(65 + c) for c in self.rng.integers(0, 26, 4)) for _ in range(200 * int(np.sqrt(scale)))])
+
+    def rows(self, name):
+        return BASE_ROWS[name] * self.scale
+
+    def choice(self, values, n):
+        return np.asarray(values)[self.rng.integers(0, len(values), n)]
+
+    def dates(self, n, start='2019-01-03', end='2024-01-03'):
+        days = (pd.Timestamp(end) - pd.Timestamp(start)).days
+        return (pd.Timestamp(start) + pd.to_timedelta(self.rng.integers(0, days, n), unit='D')).strftime('%Y-%m-%d')
+
+    def text(self, n, words=8):
+        picked = self.choice(WORDS, (n, words))
+        return [' '.join(row).capitalize() for row in picked]
+
+    def embedding_text(self, n):
+        # numpy-printed vectors ("[ 0.1 -0.2 ...]"), the way the embedding column is stored;
+        # rows cluster around a few topics so similarity scores spread like real ones
+        topics = self.rng.standard_normal((16, self.dim)).astype(np.float32)
+        vectors = topics[self.rng.integers(0, 16, n)] + 0.5 * self.rng.standard_normal((n, self.dim)).astype(np.float32)
+        return ['[' + ' '.join(f'{x: .8f}' for x in vector) + ']' for vector in vectors]
+
+    def member_columns(self, n):
+        picked = self.rng.integers(0, len(self.members), n)
+        return self.members[picked], self.names[picked]
+
+    def transactions(self):
+        n = self.rows('transactions')
+        member_id, display_name = self.member_columns(n)
+        amount = self.choice(list(AMOUNTS), n)
+        industry = self.choice(INDUSTRIES + [None], n)
+        return pd.DataFrame({
+            'uuid': [f'{self.rng.integers(0, 2 ** 63):016x}-{i:08d}' for i in range(n)],
+            'member_id': member_id,
+            'display_name': display_name,
+            'congress': self.choice(CONGRESSES, n),
+            'ticker': self.choice(self.tickers, n),
+            'asset_description': self.text(n, 3),
+            'type': self.choice(TYPES, n),
+            'amount': amount,
+            'amount_formatted': [AMOUNTS[a] for a in amount],
+            'industry': industry,
+            'sector': self.choice(SECTORS, n),
+            'state': self.choice(STATES, n),
+            'combined_transaction_date': self.dates(n),
+            'disclosure_date': self.dates(n),
+            'ptr_link': [f'https://disclosures-clerk.house.gov/ptr/{i}.pdf' for i in range(n)],
+        })
+
+    def committee_assignments(self):
+        n = self.rows('committee_assignments')
+        committee_id = self.choice(self.committees, n)
+        return pd.DataFrame({'member_id': self.member_columns(n)[0], 'congress': self.choice(CONGRESSES, n),
+                             'committee_id': committee_id, 'committee_name': [f'Committee on {c}' for c in committee_id]})
+
+    def subcommittee_assignments(self):
+        n = self.rows('subcommittee_assignments')
+        subcommittee_id = self.choice(self.subcommittees, n)
+        return pd.DataFrame({'member_id': self.member_columns(n)[0], 'congress': self.choice(CONGRESSES, n),
+                             'subcommittee_id': subcommittee_id, 'subcommittee_name': [f'Subcommittee {s}' for s in subcommittee_id]})
+
+    def statements(self):
+        n = self.rows('statements')
+        return pd.DataFrame({'member_id': self.member_columns(n)[0], 'congress': self.choice(CONGRESSES, n),
+                             'date': self.dates(n), 'title': self.text(n, 12), 'type': self.choice(STATEMENT_TYPES, n),
+                             'url': [f'https://example.house.gov/media/{i}' for i in range(n)]})
+
+    def travel(self):
+        n = self.rows('travel')
+        return pd.DataFrame({'member_id': self.member_columns(n)[0], 'congress': self.choice(CONGRESSES, n),
+                             'departure_date': self.dates(n), 'destination': self.choice(['Taipei, Taiwan', 'Brussels, Belgium', 'Aspen, CO', 'Kyiv, Ukraine'], n),
+                             'sponsor': self.choice(['Aspen Institute', 'Heritage Foundation', 'Brookings Institution'], n)})
+
+    def related_bills(self):
+        n = self.rows('related_bills')
+        return pd.DataFrame({'member_id': self.member_columns(n)[0], 'bill_congress': self.choice(CONGRESSES, n),
+                             'related_bill_id': [f'hr{i}-{c}' for i, c in enumerate(self.choice(CONGRESSES, n))],
+                             'related_bill_title': self.text(n, 10), 'related_bill_introduction_date': self.dates(n)})
+
+    def bills(self):
+        n = self.rows('bills')
+        return pd.DataFrame({'member_id': self.member_columns(n)[0], 'bill_id': [f's{i}-{c}' for i, c in enumerate(self.choice(CONGRESSES, n))],
+                             'bill_title': self.text(n, 10), 'bill_intro_date': self.dates(n)})
+
+    def hearings(self):
+        n = self.rows('hearings')
+        return pd.DataFrame({'hearing_committee_id': self.choice(self.committees, n), 'hearing_congress': self.choice(CONGRESSES, n),
+                             'hearing_date': self.dates(n), 'hearing_description': self.text(n, 30)})
+
+    def table(self, name):
+        """
+        One table as its csv file has it: an `Unnamed: 0` index column first and the embedding text last.
+        """
+        df = getattr(self, name)()
+        df.insert(0, 'Unnamed: 0', np.arange(len(df)))
+        df['embedding'] = self.embedding_text(len(df))
+        return df
+
+
+def generate(scale=1, members=None, dim=64, seed=0, shards=None):
+    """
+    {csv file name: csv text} for every table. `shards` splits the statements into
+    member_statements_final_1.csv, _2.csv, ... the way the demo bucket stores them.
+    """
+    generator = Generator(scale, members, dim, seed)
+    files = {}
+    for name, stem in embeddings.EMBEDDING_TABLES.items():
+        df = generator.table(name)
+        if name == 'statements' and shards:
+            for i, part in enumerate(np.array_split(np.arange(len(df)), shards), start=1):
+                files[f'{stem}_{i}.csv'] = df.iloc[part].to_csv(index=False)
+        else:
+            files[f'{stem}.csv'] = df.to_csv(index=False)
+    return files
+
+
+def write_dataset(data_dir, scale=1, members=None, dim=64, seed=0, shards=None):
+    """
+    Write a generated dataset where the loaders look for it (`data_dir/<stem>.csv`). Returns the file paths.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    paths = []
+    for file, text in generate(scale, members, dim, seed, shards).items():
+        paths.append(os.path.join(data_dir, file))
+        with open(paths[-1], 'w') as f:
+            f.write(text)
+    return paths
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m benchmark.synthetic data_dir [scale] [dim]
+    data_dir = sys.argv[1]
+    for path in write_dataset(data_dir, *(int(arg) for arg in sys.argv[2:4])):
+        print(path, os.path.getsize(path))
@@ -0,0 +1,250 @@
+# Helper functions for the columnar (Parquet) data layer
+
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from helper import embeddings
+
+logger = logging.getLogger(__name__)
+
+# Columns read by the Trading Activity views (transactions_selection, cumulative, graphs, relevant_info).
+# Tables not listed here are read whole (minus junk and embedding text).
+VIEW_COLUMNS = {
+    'transactions': ['uuid', 'member_id', 'display_name', 'congress', 'ticker', 'asset_description', 'type',
+                     'amount', 'amount_formatted', 'industry', 'sector', 'state', 'combined_transaction_date',
+                     'disclosure_date', 'ptr_link'],
+    'committee_assignments': ['member_id', 'congress', 'committee_id', 'committee_name'],
+    'subcommittee_assignments': ['member_id', 'congress', 'subcommittee_id', 'subcommittee_name'],
+    'statements': ['member_id', 'congress', 'date', 'title', 'type', 'url'],
+    'travel': ['member_id', 'congress', 'departure_date', 'destination', 'sponsor'],
+    'related_bills': ['member_id', 'bill_congress', 'related_bill_id', 'related_bill_title',
+                      'related_bill_introduction_date'],
+    'bills': ['member_id', 'bill_id', 'bill_title', 'bill_intro_date'],
+    'hearings': ['hearing_committee_id', 'hearing_congress', 'hearing_date', 'hearing_description'],
+}
+
+# Column types applied right after load (by typed()). Table names cover both the *_final tables
+# and the raw S3 tables app.py and multiselect.py read.
+DATE_COLUMNS = {
+    'transactions': ['combined_transaction_date', 'disclosure_date'],
+    'statements': ['date'],
+    'member_statements': ['date'],
+    'travel': ['departure_date'],
+    'related_bills': ['related_bill_introduction_date'],
+    'bills': ['bill_intro_date'],
+    'hearings': ['hearing_date'],
+    'committee_hearings': ['hearing_date'],
+}
+
+CATEGORY_COLUMNS = {
+    'transactions': ['display_name', 'ticker', 'type', 'industry', 'sector', 'state'],
+    'committee_assignments': ['committee_name'],
+    'subcommittee_assignments': ['subcommittee_name'],
+    'committees': ['committee_name', 'chamber'],
+    'subcommittees': ['subcommittee_name', 'chamber'],
+    'statements': ['type'],
+    'member_statements': ['type'],
+}
+
+# small integer ids, narrowed when the column has no missing values
+INT16_COLUMNS = {
+    'transactions': ['congress'],
+    'committee_assignments': ['congress'],
+    'subcommittee_assignments': ['congress'],
+    'committees': ['congress'],
+    'subcommittees': ['congress'],
+    'statements': ['congress'],
+    'member_statements': ['congress'],
+    'travel': ['congress'],
+    'related_bills': ['bill_congress'],
+    'hearings': ['hearing_congress'],
+    'committee_hearings': ['hearing_congress'],
+}
+
+FLOAT32_COLUMNS = {
+    'transactions': ['amount_formatted'],
+}
+
+
+def usecols(columns=None, embedding=False):
+    """
+    Column predicate for pd.read_csv: drops the `Unnamed: 0*` index junk and, unless asked for, the embedding text.
+    """
+    if columns is None:
+        return lambda column: not column.startswith('Unnamed') and (embedding or column != 'embedding')
+    return lambda column: column in columns or (embedding and column == 'embedding')
+
+
+def write_atomic(path, write):
+    """
+    Write `path` through `write(f)` on a uniquely named temporary file next to it, then rename it into
+    place: readers (and memory maps) of the old file never see a partial one, concurrent writers never
+    share a temporary file, and a failed write leaves nothing behind.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def memory_usage(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _reporting(report):
+    return report and logger.isEnabledFor(logging.INFO)
+
+
+def _report(name, before, after):
+    logger.info('%s: %.1f MB -> %.1f MB', name, before / 2 ** 20, after / 2 ** 20)
+
+
+def typed(df, name, report=True):
+    """
+    Compact column types for a table: dates, categoricals, int16 ids and float32 amounts, as listed
+    above; `Unnamed: 0*` index junk is dropped. Idempotent, so it is safe on already typed Parquet
+    reads. With `report`, memory before and after is logged per table at INFO level: pass it only
+    for a frame fresh from read_csv, otherwise "before" is already compact.
+    """
+    before = memory_usage(df) if _reporting(report) else None
+    junk = [column for column in df.columns if str(column).startswith('Unnamed')]
+    if junk:
+        df = df.drop(columns=junk)
+    for column in DATE_COLUMNS.get(name, []):
+        if column in df and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], errors='coerce')
+    for column in CATEGORY_COLUMNS.get(name, []):
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    for column in INT16_COLUMNS.get(name, []):
+        if column in df and pd.api.types.is_integer_dtype(df[column]) and df[column].dtype != np.int16:
+            df[column] = df[column].astype(np.int16)
+    for column in FLOAT32_COLUMNS.get(name, []):
+        if column in df and pd.api.types.is_float_dtype(df[column]) and df[column].dtype != np.float32:
+            df[column] = df[column].astype(np.float32)
+    if before is not None:
+        _report(name, before, memory_usage(df))
+    return df
+
+
+def read_csv_table(sources, name, columns=None, embedding=False):
+    """
+    Read one table from its csv shards (paths or S3 bodies), projected and typed.
+    """
+    return concat_typed([pd.read_csv(source, usecols=usecols(columns, embedding)) for source in sources], name)
+
+
+def read_csv_chunks(sources, name, columns=None, chunksize=embeddings.CHUNK_ROWS, report=False):
+    """
+    Stream one table from its csv shards: yields (typed chunk without the embedding text, its
+    embedding block or None, memory of the chunk as read, embedding text included, or None without
+    `report`), so only one chunk of embedding text is held at a time.
+    """
+    report = _reporting(report)
+    for source in sources:
+        for chunk in pd.read_csv(source, usecols=usecols(columns, embedding=True), chunksize=chunksize):
+            raw = memory_usage(chunk) if report else None
+            block = embeddings.embedding_matrix(chunk['embedding']) if 'embedding' in chunk else None
+            yield typed(chunk.drop(columns=['embedding'], errors='ignore'), name, report=False), block, raw
+
+
+def read_csv_streaming(sources, name, columns=None, chunksize=embeddings.CHUNK_ROWS, report=True):
+    """
+    One table (compact types, no embedding text) and its embedding matrix from any number of csv
+    shards, built chunk by chunk; the full frame with embedding text is never materialised.
+    With `report`, the memory of the chunks as read is logged against the table plus its matrix.
+    """
+    frames, blocks, raw = [], [], 0
+    for frame, block, chunk_bytes in read_csv_chunks(sources, name, columns, chunksize, report):
+        frames.append(frame)
+        blocks.append(block)
+        raw += chunk_bytes or 0
+    df = concat_typed(frames, name, report=False)
+    matrix = embeddings.stack_blocks(blocks, [len(frame) for frame in frames])
+    if _reporting(report):
+        _report(name, raw, memory_usage(df) + matrix.nbytes)
+    return df, matrix
+
+
+def concat_typed(frames, name, report=True):
+    """
+    Join the shards of one table in order and apply its types (`report` as in typed()).
+    """
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return typed(df, name, report)
+
+
+def read_table(data_dir, name, columns=None, embedding=False):
+    """
+    Read one table from `data_dir/parquet` when it has been built, otherwise from the csv shards.
+    With `embedding`, returns (table, matrix): unless the precompiled matrix was built from these very
+    shards (embeddings.is_current), the csv path streams them (read_csv_streaming) and parses the
+    matrix on the way; otherwise the matrix is None and the store's .npy applies. Pass it on to
+    embeddings.load_embedding_store as `parsed`.
+    """
+    path = os.path.join(data_dir, 'parquet', f'{name}.parquet')
+    if os.path.exists(path):
+        df = typed(pd.read_parquet(path, columns=columns), name, report=False)
+        return (df, None) if embedding else df
+    shards = embeddings.csv_shards(data_dir, embeddings.EMBEDDING_TABLES[name])
+    if embedding and not embeddings.is_current(os.path.join(data_dir, 'embeddings'), name):
+        return read_csv_streaming(shards, name, columns)
+    df = read_csv_table(shards, name, columns)
+    return (df, None) if embedding else df
+
+
+def file_sources(data_dir, extensions=('.csv', '.parquet', '.npy')):
+    """
+    {path: (size, mtime_ns)} of every data file under `data_dir`, the identity of a local dataset.
+    """
+    sources = {}
+    for root, _, files in os.walk(data_dir):
+        for file in files:
+            if file.endswith(extensions):
+                path = os.path.join(root, file)
+                stat = os.stat(path)
+                sources[path] = (stat.st_size, stat.st_mtime_ns)
+    return sources
+
+
+def dataset_version(sources):
+    """
+    Short id of a dataset from {source: identity} (file size and mtime, S3 ETag, ...).
+    It changes whenever any source is added, removed or rewritten.
+    """
+    return hashlib.sha1(repr(sorted(sources.items())).encode()).hexdigest()[:12]
+
+
+def build_dataset(data_dir='data'):
+    """
+    Convert every *_final csv into typed, zstd-compressed `data_dir/parquet/<table>.parquet`
+    (embedding text excluded) and the matching `data_dir/embeddings/<table>.npy` matrices.
+    """
+    out_dir = os.path.join(data_dir, 'parquet')
+    store_dir = os.path.join(data_dir, 'embeddings')
+    os.makedirs(out_dir, exist_ok=True)
+    os.makedirs(store_dir, exist_ok=True)
+    for name, stem in embeddings.EMBEDDING_TABLES.items():
+        shards = embeddings.csv_shards(data_dir, stem)
+        if not shards:
+            continue
+        df, matrix = read_csv_streaming(shards, name)
+        df.to_parquet(os.path.join(out_dir, f'{name}.parquet'), compression='zstd', index=False)
+        np.save(os.path.join(store_dir, f'{name}.npy'), matrix)
+        embeddings.write_fingerprint(store_dir, name, shards)
+        print(f'{name}: {len(df)} rows, {len(df.columns)} columns, embeddings {matrix.shape[0]} x {matrix.shape[1]}')
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m helper.dataset [data_dir]
+    build_dataset(*sys.argv[1:2])
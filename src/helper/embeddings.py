@@ -0,0 +1,138 @@
+# Helper functions for the precompiled embedding store
+
+import glob
+import json
+import os
+
+import numpy as np
+
+# rows per chunk when streaming csv shards
+CHUNK_ROWS = 20000
+
+# data dict key -> csv stem of the *_final tables that carry an embedding column
+EMBEDDING_TABLES = {
+    'transactions': 'transactions_final',
+    'committee_assignments': 'committee_assignments_final',
+    'subcommittee_assignments': 'subcommittee_assignments_final',
+    'statements': 'member_statements_final',
+    'travel': 'travel_final',
+    'related_bills': 'related_bills_final',
+    'bills': 'bills_final',
+    'hearings': 'committee_hearings_final',
+}
+
+
+def parse_embedding(array_string):
+    """
+    Parse a numpy-printed embedding string ("[ 0.1 -0.2\\n 0.3]") into a float32 vector.
+    """
+    return np.fromstring(array_string.strip().strip('[]'), dtype=np.float32, sep=' ')
+
+
+def embedding_matrix(embeddings):
+    """
+    Stack an embedding text column into a contiguous float32 matrix, one row per position.
+    Missing embeddings become zero rows (cosine similarity 0).
+    """
+    vectors = [parse_embedding(x) if isinstance(x, str) else None for x in embeddings]
+    dim = next((len(v) for v in vectors if v is not None), 0)
+    matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+    for i, v in enumerate(vectors):
+        if v is not None:
+            matrix[i] = v
+    return matrix
+
+
+def stack_blocks(blocks, lengths):
+    """
+    One matrix from per-chunk embedding blocks (chunk row counts in `lengths`). A block that is
+    None or narrower than the rest (a chunk without any embedding) becomes zero rows.
+    """
+    dim = max((block.shape[1] for block in blocks if block is not None), default=0)
+    return np.concatenate([np.zeros((0, dim), dtype=np.float32)] +
+                          [block if block is not None and block.shape[1] == dim else np.zeros((n, dim), dtype=np.float32)
+                           for block, n in zip(blocks, lengths)])
+
+
+def normalize_rows(matrix):
+    """
+    Unit-length float32 rows, so a dot product is the cosine similarity. Zero rows stay zero.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def csv_shards(data_dir, stem):
+    """
+    Files backing a table: either `stem.csv` or its split shards `stem_1.csv`, `stem_2.csv`, ...
+    """
+    single = os.path.join(data_dir, f'{stem}.csv')
+    if os.path.exists(single):
+        return [single]
+    shards = glob.glob(os.path.join(data_dir, f'{stem}_*.csv'))
+    return sorted(shards, key=lambda path: int(path.rsplit('_', 1)[1].split('.')[0]))
+
+
+def source_fingerprint(paths):
+    """
+    {path: [size, mtime_ns]} of the csv shards a matrix is built from.
+    """
+    fingerprint = {}
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint[os.path.abspath(path)] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def write_fingerprint(store_dir, name, paths):
+    """
+    Record the shards `store_dir/<name>.npy` was built from, in `store_dir/<name>.source.json`.
+    """
+    with open(os.path.join(store_dir, f'{name}.source.json'), 'w') as f:
+        json.dump(source_fingerprint(paths), f)
+
+
+def is_current(store_dir, name):
+    """
+    Whether `store_dir/<name>.npy` exists and none of the shards it was built from has been
+    rewritten since. Shards that are gone are not held against it (the csv may have been dropped
+    after building the store); a store without a fingerprint is not trusted.
+    """
+    if not store_dir or not os.path.exists(os.path.join(store_dir, f'{name}.npy')):
+        return False
+    try:
+        with open(os.path.join(store_dir, f'{name}.source.json')) as f:
+            recorded = json.load(f)
+    except FileNotFoundError:
+        return False
+    current = source_fingerprint([path for path in recorded if os.path.exists(path)])
+    return all(recorded[path] == identity for path, identity in current.items())
+
+
+def load_embedding_store(data, store_dir='data/embeddings', parsed=None):
+    """
+    Memory-map the precompiled matrices for the tables in `data`. A matrix already `parsed` while
+    loading (read_csv_streaming) is used as is (None entries are ignored); a table still carrying its embedding text is parsed
+    here unless its .npy is current (is_current). Without `store_dir` nothing is memory-mapped.
+    The embedding text column is dropped from `data` afterwards.
+    """
+    store = {}
+    for name in EMBEDDING_TABLES:
+        if name not in data:
+            continue
+        text = 'embedding' in data[name]
+        path = os.path.join(store_dir, f'{name}.npy') if store_dir else None
+        if parsed and parsed.get(name) is not None:
+            matrix = parsed[name]
+        else:
+            # a table read with its embedding text came from the csv: trust the .npy only if built from that csv
+            usable = path and os.path.exists(path) and (not text or is_current(store_dir, name))
+            matrix = np.load(path, mmap_mode='r') if usable else None
+            if matrix is None or len(matrix) != len(data[name]):
+                if not text:
+                    raise ValueError(f'{name}: no embedding matrix matching its {len(data[name])} rows in {store_dir}')
+                matrix = embedding_matrix(data[name]['embedding'])
+        store[name] = matrix
+        data[name] = data[name].drop(columns=['embedding'], errors='ignore')
+    return store
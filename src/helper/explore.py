@@ -0,0 +1,67 @@
+# Helper functions for the Interactive Data Explore tab: compact, bounded frames and a server-side pygwalker renderer
+
+import inspect
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows handed to the explorer at most; larger tables are uniformly sampled down to it
+ROW_BUDGET = int(os.environ.get('POLIWATCH_EXPLORE_ROWS', 100000))
+ROW_BUDGETS = sorted({10000, 100000, 1000000, ROW_BUDGET}) + [None]
+
+# string columns averaging more characters than this are free text (titles, descriptions, summaries)
+TEXT_CHARS = 60
+TEXT_SAMPLE_ROWS = 1000
+
+
+def text_columns(df, max_chars=TEXT_CHARS, sample_rows=TEXT_SAMPLE_ROWS):
+    """
+    Columns too heavy to explore by default: embedding text, and string columns whose values
+    average more than `max_chars` characters over the first `sample_rows` rows. Categoricals never count.
+    """
+    heavy = []
+    for column in df.columns:
+        values = df[column]
+        if column == 'embedding':
+            heavy.append(column)
+        elif not isinstance(values.dtype, pd.CategoricalDtype) and pd.api.types.is_string_dtype(values.dtype):
+            head = values.iloc[:sample_rows].dropna()
+            if len(head) and head.astype(str).str.len().mean() > max_chars:
+                heavy.append(column)
+    return heavy
+
+
+def sample(df, row_budget=ROW_BUDGET, seed=0):
+    """
+    At most `row_budget` rows of df, uniformly sampled (with a fixed seed, so reruns agree) and kept in table order.
+    """
+    if row_budget is None or len(df) <= row_budget:
+        return df
+    positions = np.sort(np.random.default_rng(seed).choice(len(df), row_budget, replace=False))
+    return df.iloc[positions].reset_index(drop=True)
+
+
+def prepare(df, include_text=False, row_budget=ROW_BUDGET):
+    """
+    The frame the explorer gets: junk index columns dropped, heavy text left out unless
+    `include_text`, sampled down to `row_budget` rows. Returns (frame, {rows, total, excluded}).
+    """
+    df = df.drop(columns=[column for column in df.columns if column.startswith('Unnamed')])
+    excluded = [] if include_text else text_columns(df)
+    frame = sample(df.drop(columns=excluded), row_budget)
+    return frame, {'rows': len(frame), 'total': len(df), 'excluded': excluded}
+
+
+def renderer(df, spec='./gw_config.json'):
+    """
+    pygwalker StreamlitRenderer computing in the server process: the browser sends chart queries
+    and receives aggregated results rather than the whole table.
+    """
+    from pygwalker.api.streamlit import StreamlitRenderer
+
+    # pygwalker 0.3 calls server-side computation `use_kernel_calc`, later releases `kernel_computation`
+    parameters = inspect.signature(StreamlitRenderer).parameters
+    computation = 'kernel_computation' if 'kernel_computation' in parameters else 'use_kernel_calc'
+    # debug=False keeps other users from writing to the chart configuration file
+    return StreamlitRenderer(df, spec=spec, debug=False, **{computation: True})
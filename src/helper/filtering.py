@@ -0,0 +1,47 @@
+# Helper functions for multi-value filtering and server-side pagination
+
+import numpy as np
+
+
+def build_postings(df, columns):
+    """
+    {column: {value: ascending row positions}} for each filterable column, plus {column: all values}
+    in first-appearance order under the 'options' key.
+    """
+    return {'postings': {column: df.groupby(column, sort=False, observed=True).indices for column in columns},
+            'options': {column: df[column].dropna().unique().tolist() for column in columns}}
+
+
+def resolve(index, selections):
+    """
+    Ascending row positions matching every {column: selected values} entry (values within a column
+    are OR-ed), or None when nothing is filtered (all rows). Never touches the base table.
+    """
+    positions = None
+    for column, values in selections.items():
+        postings = index['postings'][column]
+        matches = [postings[value] for value in values if value in postings]
+        matches = np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int64)
+        positions = matches if positions is None else np.intersect1d(positions, matches, assume_unique=True)
+    return positions
+
+
+def options(df, index, column, positions):
+    """
+    Distinct values of `column` among the matching rows, in first-appearance order.
+    """
+    if positions is None:
+        return index['options'][column]
+    return df[column].iloc[positions].dropna().unique().tolist()
+
+
+def count(df, positions):
+    return len(df) if positions is None else len(positions)
+
+
+def page(df, positions, number, page_size):
+    """
+    Rows of page `number` (0-based) of the matching rows; only these rows are materialised.
+    """
+    start, stop = number * page_size, (number + 1) * page_size
+    return df.iloc[start:stop] if positions is None else df.iloc[positions[start:stop]]
@@ -0,0 +1,36 @@
+# Helper functions for politicians' running positions and holdings
+
+import numpy as np
+
+
+def cumulative_positions(transactions):
+    """
+    Signed amount (purchases positive, sales negative) and running position per (politician, ticker)
+    for every non-exchange transaction, in date order. One politician's rows are exactly what a
+    per-politician filter, sort and groupby('ticker').cumsum() would give.
+    """
+    filtered = transactions[transactions['type'] != 'exchange'].sort_values(by=['combined_transaction_date'], kind='stable')
+    # amounts are stored as float32; running positions are summed in float64
+    amounts = filtered['amount_formatted'].to_numpy(dtype=np.float64)
+    filtered['actual_amount'] = np.where(filtered['type'] == 'purchase', amounts, -amounts)
+    filtered['cumulative_amount'] = filtered.groupby(['display_name', 'ticker'], observed=True)['actual_amount'].cumsum()
+    return filtered
+
+
+def build_holdings(transactions):
+    """
+    Pre-aggregated holdings for every politician, for the Trading Activity charts:
+    - holdings_by_ticker: net position per (politician, ticker), i.e. its last running position
+    - holdings_by_industry: those positions summed per (politician, industry)
+    - positions_over_time: last running position per (politician, ticker, transaction date)
+    """
+    positions = cumulative_positions(transactions)
+    by_ticker = positions.groupby(['display_name', 'ticker'], observed=True)[
+        ['asset_description', 'cumulative_amount', 'industry', 'sector']].last().reset_index()
+    by_industry = by_ticker.assign(industry=by_ticker['industry'].astype(object).fillna("No Industry")).groupby(
+        ['display_name', 'industry'], observed=True)[['cumulative_amount']].sum().reset_index()
+    over_time = positions.groupby(['display_name', 'ticker', 'combined_transaction_date'], observed=True)[
+        ['cumulative_amount']].last().reset_index()
+    return {'holdings_by_ticker': by_ticker,
+            'holdings_by_industry': by_industry,
+            'positions_over_time': over_time}
@@ -0,0 +1,202 @@
+# Helper functions for folding new and changed rows into the dataset without a full reload
+
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from helper import dataset, embeddings, holdings, member_index, selection_index, shared_dataset
+
+# table -> columns identifying a row across deliveries
+NATURAL_KEYS = {
+    'transactions': ['uuid'],
+    'committee_assignments': ['member_id', 'congress', 'committee_id'],
+    'subcommittee_assignments': ['member_id', 'congress', 'subcommittee_id'],
+    'statements': ['url'],
+    'travel': ['member_id', 'congress', 'departure_date', 'destination'],
+    'related_bills': ['member_id', 'bill_congress', 'related_bill_id'],
+    'bills': ['member_id', 'bill_id'],
+    'hearings': ['hearing_committee_id', 'hearing_congress', 'hearing_date', 'hearing_description'],
+}
+
+HOLDINGS_KEYS = ['holdings_by_ticker', 'holdings_by_industry', 'positions_over_time']
+
+# New deliveries are dropped here as <csv stem>*.csv, e.g. transactions_final_2023-12-01.csv
+INCOMING_DIR = 'data/incoming'
+
+
+def incoming_files(incoming_dir, stem):
+    return sorted(glob.glob(os.path.join(incoming_dir, f'{stem}*.csv')))
+
+
+def read_incoming(paths, name, columns=None):
+    """
+    Typed rows of one table from delivered csv files, and their parsed embedding matrix.
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(columns + NATURAL_KEYS[name]))
+    df = dataset.read_csv_table(paths, name, columns, embedding=True)
+    matrix = embeddings.embedding_matrix(df['embedding']) if 'embedding' in df else None
+    return df.drop(columns=['embedding'], errors='ignore'), matrix
+
+
+def _key_index(df, keys):
+    return pd.Index(df[keys[0]]) if len(keys) == 1 else pd.MultiIndex.from_frame(df[keys])
+
+
+def merge(current, matrix, incoming, incoming_matrix, name):
+    """
+    Fold `incoming` rows into one table and its embedding matrix by natural key. Changed rows are
+    overwritten at their current position and new rows appended, so every existing row keeps its
+    position (and with it its embedding row and index entries); unchanged rows are skipped.
+    Returns (table, matrix, replaced positions, appended positions).
+    """
+    keys = NATURAL_KEYS[name]
+    last = ~incoming.duplicated(keys, keep='last').to_numpy()
+    incoming = incoming[last].reset_index(drop=True)
+    if incoming_matrix is None or incoming_matrix.shape[1] != matrix.shape[1]:
+        incoming_matrix = np.zeros((len(last), matrix.shape[1]), dtype=np.float32)
+    incoming_matrix = incoming_matrix[last]
+
+    columns = list(current.columns)
+    positions = pd.Series(np.arange(len(current)), index=_key_index(current, keys))
+    found = positions[~positions.index.duplicated()].reindex(_key_index(incoming, keys)).to_numpy()
+    new = np.isnan(found)
+    matched = np.flatnonzero(~new)
+    before = current.iloc[found[matched].astype(np.int64)][columns].astype(object).to_numpy()
+    after = incoming.iloc[matched].reindex(columns=columns).astype(object).to_numpy()
+    changed = np.zeros(len(incoming), dtype=bool)
+    changed[matched] = ((before != after) & ~(pd.isna(before) & pd.isna(after))).any(axis=1)
+
+    take = np.flatnonzero(new | changed)
+    replaced = found[changed].astype(np.int64)
+    if len(take) == 0:
+        return current, matrix, replaced, replaced
+    combined = dataset.concat_typed([current, incoming.iloc[take].reindex(columns=columns)], name, report=False)
+    order = np.concatenate([np.arange(len(current)), len(current) + np.flatnonzero(new[take])])
+    order[replaced] = len(current) + np.flatnonzero(changed[take])
+    table = combined.iloc[order].reset_index(drop=True)
+    matrix = np.concatenate([np.asarray(matrix), incoming_matrix[take]])[order]
+    return table, matrix, replaced, np.arange(len(current), len(table))
+
+
+def affected_members(data, name, rows):
+    """
+    Members whose relevant_info reads any of `rows` of data[name]: the row's own member, or for
+    hearings every member assigned to the hearing's committee in that congress.
+    """
+    if name != 'hearings':
+        return set(data[name]['member_id'].iloc[rows].tolist())
+    committees = member_index.key_values(data[name], ['hearing_committee_id', 'hearing_congress'], rows)
+    assignments = data['committee_assignments']
+    assigned = pd.MultiIndex.from_frame(assignments[['committee_id', 'congress']]).isin(list(committees))
+    return set(assignments['member_id'][assigned].tolist())
+
+
+def update_holdings(data, politicians):
+    """
+    Holdings frames with the rows of `politicians` recomputed from data['transactions'].
+    """
+    transactions = data['transactions']
+    recomputed = holdings.build_holdings(transactions[transactions['display_name'].isin(list(politicians))])
+    updated = {}
+    for name in HOLDINGS_KEYS:
+        kept = data[name][~data[name]['display_name'].isin(list(politicians))]
+        frame = pd.concat([kept, recomputed[name]], ignore_index=True)
+        for column in kept.columns:
+            if isinstance(kept[column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype('category')
+        updated[name] = frame
+    return updated
+
+
+def apply(data, name, incoming, incoming_matrix, index_keys=member_index.INDEX_KEYS, date_keys=member_index.DATE_KEYS):
+    """
+    A new data dict (a load_data result is shared, so it is never modified) with `incoming` rows
+    folded into data[name]: table, embedding matrix and index entries of the touched keys, plus the
+    holdings, selectors and precomputed top-k of the politicians involved when transactions change.
+    Returns (data, affected member ids); the same dict and an empty set when nothing changed.
+    """
+    current = data[name]
+    table, matrix, replaced, appended = merge(current, data['embeddings'][name], incoming, incoming_matrix, name)
+    rows = np.concatenate([replaced, appended])
+    if len(rows) == 0:
+        return data, set()
+
+    updated = {**data, name: table, 'embeddings': {**data['embeddings'], name: matrix}, 'index': dict(data['index'])}
+    keys = index_keys[name]
+    values = member_index.key_values(current, keys, replaced) | member_index.key_values(table, keys, rows)
+    updated['index'][name] = member_index.update_index(data['index'][name], table, keys, values, date_keys.get(name))
+    members = affected_members(data, name, replaced) | affected_members(updated, name, rows)
+
+    if name == 'transactions':
+        politicians = set(current['display_name'].iloc[replaced].tolist()) | set(table['display_name'].iloc[rows].tolist())
+        updated.update(update_holdings(updated, politicians))
+        for holdings_name in HOLDINGS_KEYS:
+            updated['index'][holdings_name] = member_index.build_index(updated[holdings_name], index_keys[holdings_name])
+        updated['selection'] = selection_index.update_selection_index(data['selection'], table, politicians)
+    if data.get('top_k') is not None:
+        transactions = updated['transactions']
+        stale = transactions['uuid'][transactions['member_id'].isin(list(members))]
+        updated['top_k'] = data['top_k'][~data['top_k'].index.isin(stale)]
+
+    changes = int(pd.util.hash_pandas_object(table.iloc[rows], index=False).sum())
+    updated['version'] = dataset.dataset_version({'previous': data['version'], name: changes})
+    return updated, members
+
+
+def ingest_incoming(data, incoming_dir=INCOMING_DIR, columns=dataset.VIEW_COLUMNS):
+    """
+    Fold every not yet ingested delivery in `incoming_dir` into a load_data result.
+    Returns (data, affected member ids).
+    """
+    members = set()
+    seen = data.get('ingested', {})
+    for name, stem in embeddings.EMBEDDING_TABLES.items():
+        paths = [path for path in incoming_files(incoming_dir, stem) if seen.get(path) != os.path.getmtime(path)]
+        if name not in data or not paths:
+            continue
+        incoming, incoming_matrix = read_incoming(paths, name, columns.get(name))
+        data, changed = apply(data, name, incoming, incoming_matrix)
+        data = {**data, 'ingested': {**seen, **{path: os.path.getmtime(path) for path in paths}}}
+        seen = data['ingested']
+        members |= changed
+    return data, members
+
+
+def ingest_store(data_dir='data', incoming_dir=None):
+    """
+    Fold the deliveries in `incoming_dir` into the on-disk store (full tables in `data_dir/parquet`,
+    matrices in `data_dir/embeddings`), rewriting only the tables that changed. When the dataset has
+    been published (helper.shared_dataset), the changed tables are republished too, since the apps read
+    the published copy first.
+    """
+    incoming_dir = incoming_dir or os.path.join(data_dir, 'incoming')
+    store_dir = os.path.join(data_dir, 'embeddings')
+    os.makedirs(os.path.join(data_dir, 'parquet'), exist_ok=True)
+    os.makedirs(store_dir, exist_ok=True)
+    changed = set()
+    for name, stem in embeddings.EMBEDDING_TABLES.items():
+        paths = incoming_files(incoming_dir, stem)
+        if not paths:
+            continue
+        current, parsed = dataset.read_table(data_dir, name, embedding=True)
+        matrix = embeddings.load_embedding_store({name: current}, store_dir, {name: parsed})[name]
+        incoming, incoming_matrix = read_incoming(paths, name)
+        table, matrix, replaced, appended = merge(current, matrix, incoming, incoming_matrix, name)
+        print(f'{name}: {len(replaced)} changed, {len(appended)} new rows')
+        if len(replaced) or len(appended):
+            # readers may have the old file memory-mapped: never rewrite it in place
+            dataset.write_atomic(os.path.join(data_dir, 'parquet', f'{name}.parquet'),
+                                 lambda f: table.to_parquet(f, compression='zstd', index=False))
+            dataset.write_atomic(os.path.join(store_dir, f'{name}.npy'), lambda f: np.save(f, matrix))
+            changed.add(name)
+    if changed and shared_dataset.published_dir(data_dir):
+        shared_dataset.publish(data_dir, tables=changed)
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m helper.ingest [data_dir] [incoming_dir]
+    ingest_store(*sys.argv[1:3])
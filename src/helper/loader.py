@@ -0,0 +1,36 @@
+# Helper functions for loading the dataset the views query: tables, embedding matrices, holdings and indexes
+
+import os
+
+from helper import dataset, embeddings, holdings, member_index, scoring, selection_index, shared_dataset, timing
+
+
+def load_data(data_dir='data', views=True):
+    """
+    The view tables of `data_dir` (attached to the published generation when there is one, see
+    helper.shared_dataset), their embedding matrices under 'embeddings' and the member / date indexes.
+    With `views`, also the holdings tables, the selection index and the precomputed top-k scores
+    (None when not built). 'version' identifies the files it was all loaded from.
+    """
+    published = shared_dataset.published_dir(data_dir)
+    with timing.span('load_data.tables') as span:
+        # csv tables without a current .npy are streamed, their matrices parsed on the way
+        data, parsed = {}, {}
+        for name, columns in dataset.VIEW_COLUMNS.items():
+            data[name], parsed[name] = shared_dataset.read_table(data_dir, name, columns, embedding=True, published=published)
+        span.rows = sum(len(df) for df in data.values())
+    with timing.span('load_data.embeddings') as span:
+        data['embeddings'] = embeddings.load_embedding_store(data, shared_dataset.embedding_dir(data_dir, published), parsed)
+        span.rows = sum(len(matrix) for matrix in data['embeddings'].values())
+    if views:
+        with timing.span('load_data.holdings', len(data['transactions'])):
+            data.update(holdings.build_holdings(data['transactions']))
+    with timing.span('load_data.indexes'):
+        data['index'] = member_index.build_indexes(data)
+        if views:
+            data['selection'] = selection_index.build_selection_index(data['transactions'])
+    if views:
+        with timing.span('load_data.top_k'):
+            data['top_k'] = scoring.load_top_k(os.path.join(data_dir, 'scores', 'top_k.parquet'))
+    data['version'] = dataset.dataset_version({**dataset.file_sources(data_dir), **dataset.file_sources(shared_dataset.shared_dir(data_dir))})
+    return data
@@ -0,0 +1,124 @@
+# Helper functions for the per-member / per-congress row index over the activity tables
+
+import numpy as np
+import pandas as pd
+
+# table -> columns its rows are looked up by in relevant_info
+INDEX_KEYS = {
+    'transactions': ['uuid'],
+    'committee_assignments': ['member_id', 'congress'],
+    'subcommittee_assignments': ['member_id', 'congress'],
+    'bills': ['member_id'],
+    'hearings': ['hearing_committee_id', 'hearing_congress'],
+    'travel': ['member_id', 'congress'],
+    'related_bills': ['member_id', 'bill_congress'],
+    'statements': ['member_id', 'congress'],
+    'holdings_by_ticker': ['display_name'],
+    'holdings_by_industry': ['display_name'],
+    'positions_over_time': ['display_name', 'ticker'],
+}
+
+
+# table -> date column its "activity before the trade" cutoff applies to
+DATE_KEYS = {
+    'bills': 'bill_intro_date',
+    'hearings': 'hearing_date',
+    'travel': 'departure_date',
+    'related_bills': 'related_bill_introduction_date',
+    'statements': 'date',
+}
+
+
+def _check_positions(df):
+    # callers address data['embeddings'] with the labels select returns, so they must be row positions
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        raise ValueError('member_index needs tables with a default RangeIndex (labels equal to row positions)')
+
+
+def build_index(df, keys, date_column=None):
+    """
+    Map each key value (a tuple for multi-column keys) to the ascending row positions holding it.
+    With `date_column` (datetime64), each key instead maps to (positions, dates), both ordered by
+    date (NaT last), so date cutoffs are a searchsorted.
+    """
+    groups = df.groupby(keys[0] if len(keys) == 1 else keys, sort=False, observed=True).indices
+    if date_column is None:
+        return groups
+    dates = df[date_column].values
+    index = {}
+    for key, positions in groups.items():
+        order = np.argsort(dates[positions], kind='stable')
+        index[key] = (positions[order], dates[positions[order]])
+    return index
+
+
+def build_indexes(data, index_keys=INDEX_KEYS, date_keys=DATE_KEYS):
+    """
+    One index per table present in `data`; built once alongside the cached load_data result.
+    Every table must have a default RangeIndex, see select.
+    """
+    for name in index_keys:
+        if name in data:
+            _check_positions(data[name])
+    return {name: build_index(data[name], keys, date_keys.get(name)) for name, keys in index_keys.items() if name in data}
+
+
+def key_values(df, keys, positions):
+    """
+    Set of index key values (tuples for multi-column keys) held by the rows at `positions`.
+    """
+    rows = df.iloc[positions]
+    if len(keys) == 1:
+        return set(rows[keys[0]].tolist())
+    return set(zip(*(rows[key].tolist() for key in keys)))
+
+
+def update_index(index, df, keys, values, date_column=None):
+    """
+    Copy of `index` with the entries of the key `values` rebuilt from df, for rows that were
+    added or changed in place; entries of every other key are reused as they are.
+    """
+    _check_positions(df)
+    if len(keys) == 1:
+        mask = df[keys[0]].isin(list(values))
+    else:
+        mask = pd.MultiIndex.from_frame(df[keys]).isin(list(values))
+    rows = np.flatnonzero(mask)
+    updated = {key: entry for key, entry in index.items() if key not in values}
+    for key, entry in build_index(df.iloc[rows], keys, date_column).items():
+        updated[key] = (rows[entry[0]], entry[1]) if isinstance(entry, tuple) else rows[entry]
+    return updated
+
+
+def _date_range(positions, dates, before, window):
+    if np.isnat(before):
+        return positions[:0]
+    hi = dates.searchsorted(before, side='right')
+    lo = 0 if window is None else dates.searchsorted(before - window, side='left')
+    return positions[lo:hi]
+
+
+def select(data, name, keys, before=None, window=None):
+    """
+    Rows of data[name] whose index key is any of `keys`, in table order. Same frame (index labels
+    included) as the equivalent boolean-mask filter, but costs O(matches) instead of O(rows).
+    The labels are row positions (build_indexes checks for a RangeIndex), so they also address
+    the rows of data['embeddings'][name].
+    On date-indexed tables, `before` (np.datetime64) keeps only rows dated on or before it and
+    `window` (np.timedelta64) further limits them to the `window` before that.
+    """
+    index = data['index'][name]
+    positions = []
+    for key in dict.fromkeys(keys):
+        if key not in index:
+            continue
+        entry = index[key]
+        if isinstance(entry, tuple):
+            entry = entry[0] if before is None else _date_range(*entry, np.datetime64(before), window)
+            entry = np.sort(entry)
+        positions.append(entry)
+    if not positions:
+        return data[name].iloc[:0]
+    if len(positions) == 1:
+        return data[name].iloc[positions[0]]
+    return data[name].iloc[np.sort(np.concatenate(positions))]
@@ -0,0 +1,100 @@
+# Helper functions for the process-wide cache of scored relevant-info results
+
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MAX_BYTES = int(os.environ.get('POLIWATCH_RESULT_CACHE_MB', 256)) * 2 ** 20
+
+
+def result_size(value):
+    """
+    Approximate memory held by a cached result: deep size of its frames, shallow size of anything else.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sum(result_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(result_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its results rather than their number.
+    Keys start with the dataset version, so a reload never serves results of older data.
+    Cached results are shared between sessions and must not be modified by callers.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Cached result for `key`, or the result of `compute()` (stored when it fits the budget).
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = result_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+                logger.debug('result cache evicted %d bytes', evicted)
+
+    def advance(self, old_version, new_version, keep):
+        """
+        Carry the entries of `old_version` that `keep(key)` accepts over to `new_version` (keys
+        start with the dataset version) and drop every other entry. Returns the number dropped.
+        """
+        with self._lock:
+            entries, self._entries = self._entries, OrderedDict()
+            self.bytes = 0
+            for key, (value, size) in entries.items():
+                if key[0] == old_version and keep(key):
+                    self._entries[(new_version,) + key[1:]] = (value, size)
+                    self.bytes += size
+            return len(entries) - len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,101 @@
+# Helper functions for the persistent on-disk S3 object cache
+
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from helper import dataset, timing
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get('POLIWATCH_S3_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'poliwatch', 's3'))
+
+
+def cached_object(client, bucket, key, cache_dir=CACHE_DIR):
+    """
+    Local path of s3://bucket/key. A cached copy is revalidated with a conditional GET
+    (If-None-Match on its stored ETag) and reused when S3 answers 304 Not Modified.
+    """
+    # botocore comes with the client: importing it here keeps it out of the apps' startup
+    from botocore.exceptions import ClientError
+
+    path = os.path.join(cache_dir, bucket, key)
+    etag_path = path + '.etag'
+    request = {'Bucket': bucket, 'Key': key}
+    if os.path.exists(path) and os.path.exists(etag_path):
+        with open(etag_path) as f:
+            request['IfNoneMatch'] = f.read()
+    try:
+        response = client.get_object(**request)
+    except ClientError as e:
+        if 'IfNoneMatch' in request and e.response['Error']['Code'] in ('304', 'NotModified'):
+            return path
+        raise
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dataset.write_atomic(path, lambda f: shutil.copyfileobj(response['Body'], f))
+    dataset.write_atomic(etag_path, lambda f: f.write(response['ETag'].encode()))
+    return path
+
+
+def list_shards(client, bucket, prefix):
+    """
+    Keys of the csv shards `prefix`1.csv, `prefix`2.csv, ... in shard order, however many there are.
+    """
+    shards = []
+    for page in client.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get('Contents', []):
+            number = item['Key'][len(prefix):].split('.')[0]
+            if item['Key'].endswith('.csv') and number.isdigit():
+                shards.append((int(number), item['Key']))
+    return [key for _, key in sorted(shards)]
+
+
+def etags(bucket, keys, cache_dir=CACHE_DIR):
+    """
+    {key: ETag} of the cached copies of `keys` (None for a key that has not been fetched).
+    """
+    tags = {}
+    for key in keys:
+        etag_path = os.path.join(cache_dir, bucket, key) + '.etag'
+        tags[key] = open(etag_path).read() if os.path.exists(etag_path) else None
+    return tags
+
+
+def load_objects(client, bucket, keys, parse, cache_dir=CACHE_DIR, max_workers=8):
+    """
+    Fetch `keys` through the cache on a thread pool and run `parse(key, path)` in the same worker
+    as soon as each object is local. `client` is shared by the workers, so it should be a boto3
+    client (thread-safe) with max_pool_connections >= max_workers.
+    Returns ({key: parsed}, {key: timing}); timings are also recorded as `s3.fetch.<key>` and
+    `s3.parse.<key>` spans (see helper.timing) and logged, slowest object first.
+    """
+    def load(key):
+        start = time.perf_counter()
+        path = cached_object(client, bucket, key, cache_dir)
+        fetched = time.perf_counter()
+        parsed = parse(key, path)
+        return parsed, {'fetch_seconds': fetched - start,
+                        'parse_seconds': time.perf_counter() - fetched,
+                        'bytes': os.path.getsize(path)}
+
+    keys = list(keys)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        loaded = dict(zip(keys, pool.map(load, keys)))
+    timings = {key: seconds for key, (_, seconds) in loaded.items()}
+    for key, seconds in sorted(timings.items(), key=lambda item: -(item[1]['fetch_seconds'] + item[1]['parse_seconds'])):
+        timing.observe(f's3.fetch.{key}', seconds['fetch_seconds'])
+        timing.observe(f's3.parse.{key}', seconds['parse_seconds'])
+        logger.info('s3://%s/%s: fetch %.3fs, parse %.3fs, %d bytes', bucket, key,
+                    seconds['fetch_seconds'], seconds['parse_seconds'], seconds['bytes'])
+    return {key: parsed for key, (parsed, _) in loaded.items()}, timings
+
+
+def fetch_objects(client, bucket, keys, cache_dir=CACHE_DIR, max_workers=8):
+    """
+    Revalidate or download `keys` in parallel. Returns {key: local path}.
+    """
+    paths, _ = load_objects(client, bucket, keys, lambda key, path: path, cache_dir, max_workers)
+    return paths
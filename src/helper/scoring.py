@@ -0,0 +1,180 @@
+# Helper functions for batch conflict scoring: every transaction against its member's prior activity
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from helper import embeddings, member_index, timing
+
+# activity type -> column identifying an activity (None: its row position in the table)
+ACTIVITY_IDS = {
+    'committee_assignments': 'committee_id',
+    'subcommittee_assignments': 'subcommittee_id',
+    'hearings': None,
+    'bills': 'bill_id',
+    'related_bills': 'related_bill_id',
+    'travel': None,
+    'statements': 'url',
+}
+
+# relevant_info category -> the activity tables it shows
+CATEGORIES = {
+    'Assignments & Hearings': ('committee_assignments', 'subcommittee_assignments', 'hearings'),
+    'Bills': ('bills', 'related_bills'),
+    'Travel & Statements': ('travel', 'statements'),
+}
+
+TOP_K_PATH = 'data/scores/top_k.parquet'
+
+
+def candidate_rows(data, name, member_id, congress, before=None, window=None):
+    """
+    The activity relevant_info considers for a member and congress; dated tables are cut off at
+    `before` (and limited to the `window` before it) when given.
+    """
+    if name == 'hearings':
+        committees = member_index.select(data, 'committee_assignments', [(member_id, congress)])['committee_id'].values
+        return member_index.select(data, 'hearings', [(committee_id, congress) for committee_id in committees], before, window)
+    if name == 'bills':
+        return member_index.select(data, 'bills', [member_id], before, window)
+    return member_index.select(data, name, [(member_id, congress)], before, window)
+
+
+def top_k(scores, k):
+    """
+    Column indices of the k best scores per row, best first, via argpartition (no full sort).
+    """
+    k = min(k, scores.shape[1])
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(best, order, axis=1)
+
+
+def top_similar(matrix, rows, query, k=None, threshold=None):
+    """
+    Indices into `rows` of the k rows of `matrix` most cosine-similar to `query` scoring at least
+    `threshold`, best first, and their scores. Partial selection (argpartition) rather than a full
+    sort; k=None keeps every row that passes the threshold.
+    """
+    scores = embeddings.normalize_rows(matrix[rows]) @ embeddings.normalize_rows(np.atleast_2d(query))[0]
+    candidates = np.arange(len(scores)) if threshold is None else np.flatnonzero(scores >= threshold)
+    if k is not None and k < len(candidates):
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    best = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return best, scores[best]
+
+
+def transaction_activity(data, transaction_uuid, lookback_days=None, k=None, threshold=None, names=tuple(ACTIVITY_IDS)):
+    """
+    relevant_info's ranked activity for one transaction: {table: candidate rows, most similar first,
+    with a `similarity` column}. Tables with no row passing `threshold` are left out; None when
+    the uuid is unknown. The one scoring path behind the views, the query service and the benchmark.
+    """
+    transaction = member_index.select(data, 'transactions', [transaction_uuid])
+    if len(transaction) == 0:
+        return None
+    query = data['embeddings']['transactions'][transaction.index.values[:1]]
+    before = transaction['combined_transaction_date'].values[0]
+    window = None if lookback_days is None else np.timedelta64(lookback_days, 'D')
+    ranked = {}
+    for name in names:
+        rows = candidate_rows(data, name, transaction['member_id'].values[0], transaction['congress'].values[0], before, window)
+        if len(rows) == 0:
+            continue
+        with timing.span(f'relevant_info.score.{name}', len(rows)):
+            best, scores = top_similar(data['embeddings'][name], rows.index.values, query, k, threshold)
+        if len(best):
+            ranked[name] = rows.iloc[best].assign(similarity=scores)
+    return ranked
+
+
+def category_activity(data, transaction_uuid, category, lookback_days=None, k=None, threshold=None):
+    """
+    transaction_activity over the tables of one relevant_info category: {table: ranked rows, or None
+    when none pass}, for every table of the category. None when the uuid is unknown.
+    """
+    ranked = transaction_activity(data, transaction_uuid, lookback_days, k, threshold, CATEGORIES[category])
+    if ranked is None:
+        return None
+    return {name: ranked.get(name) for name in CATEGORIES[category]}
+
+
+def score_member(data, normalized, transaction_rows, member_id, congress, k, block_size):
+    """
+    Top-k activity of each type for one member's transactions in one congress, scored in blocks.
+    """
+    transactions = data['transactions']
+    transaction_dates = transactions['combined_transaction_date'].values[transaction_rows]
+    results = []
+    for name, id_column in ACTIVITY_IDS.items():
+        if name not in data:
+            continue
+        rows = candidate_rows(data, name, member_id, congress)
+        if len(rows) == 0:
+            continue
+        activity = normalized[name][rows.index.values]
+        activity_ids = rows.index.values if id_column is None else rows[id_column].to_numpy()
+        date_column = member_index.DATE_KEYS.get(name)
+        activity_dates = rows[date_column].values if date_column else None
+
+        for start in range(0, len(transaction_rows), block_size):
+            block = transaction_rows[start:start + block_size]
+            scores = normalized['transactions'][block] @ activity.T
+            if activity_dates is not None:
+                # activity must be dated on or before the transaction (NaT never qualifies)
+                after = ~(activity_dates[None, :] <= transaction_dates[start:start + block_size, None])
+                scores[after] = -np.inf
+            best = top_k(scores, k)
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            keep = np.isfinite(best_scores)
+            results.append(pd.DataFrame({
+                'uuid': np.repeat(transactions['uuid'].to_numpy()[block], best.shape[1])[keep.ravel()],
+                'activity_type': name,
+                'activity_row': rows.index.values[best][keep],
+                'activity_id': activity_ids[best][keep].astype(str),
+                'score': best_scores[keep].astype(np.float32),
+                'rank': np.tile(np.arange(1, best.shape[1] + 1), len(block))[keep.ravel()],
+            }))
+    return results
+
+
+def score_all(data, k=10, block_size=256):
+    """
+    Top-k (activity type, id, score) per transaction over all transactions, grouped by member and
+    congress so each member's activity is normalised and multiplied once per block of transactions.
+    `data` is a load_data result (tables, 'embeddings' and 'index').
+    """
+    normalized = {name: embeddings.normalize_rows(matrix) for name, matrix in data['embeddings'].items()}
+    groups = data['transactions'].groupby(['member_id', 'congress'], sort=False, observed=True).indices
+    results = []
+    for (member_id, congress), transaction_rows in groups.items():
+        results.extend(score_member(data, normalized, transaction_rows, member_id, congress, k, block_size))
+    columns = ['uuid', 'activity_type', 'activity_row', 'activity_id', 'score', 'rank']
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=columns)
+
+
+def load_top_k(path=TOP_K_PATH):
+    """
+    Precomputed top-k table indexed by transaction uuid, or None when it has not been built.
+    """
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path).set_index('uuid')
+
+
+def build_top_k(data_dir='data', k=10):
+    # imported here: helper.loader itself imports this module for load_top_k
+    from helper import loader
+
+    top = score_all(loader.load_data(data_dir, views=False), int(k))
+    path = os.path.join(data_dir, 'scores', 'top_k.parquet')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    top.to_parquet(path, index=False)
+    print(f'{top["uuid"].nunique()} transactions, {len(top)} scored activities -> {path}')
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m helper.scoring [data_dir] [k]
+    build_top_k(*sys.argv[1:3])
@@ -0,0 +1,38 @@
+# Helper functions for the cascading politician -> ticker -> date selectors
+
+import numpy as np
+
+
+def build_selection_index(transactions):
+    """
+    {politician: {ticker: {date: row positions}}} over rows with all three set. Politicians and
+    tickers keep their first-appearance order (what .unique() gives), dates are sorted.
+    """
+    groups = transactions.groupby(['display_name', 'ticker', 'combined_transaction_date'], sort=False, observed=True).indices
+    index = {}
+    # visiting groups by their first row gives politicians and tickers in first-appearance order
+    for (politician, ticker, date), positions in sorted(groups.items(), key=lambda item: item[1][0]):
+        index.setdefault(politician, {}).setdefault(ticker, {})[date] = positions
+    for tickers in index.values():
+        for ticker, dates in tickers.items():
+            tickers[ticker] = dict(sorted(dates.items()))
+    return index
+
+
+def update_selection_index(index, transactions, politicians):
+    """
+    Copy of `index` with the entries of `politicians` rebuilt from `transactions`, for rows that
+    were added or changed in place. Other politicians are reused; new ones go last.
+    """
+    rows = np.flatnonzero(transactions['display_name'].isin(list(politicians)))
+    rebuilt = {politician: {ticker: {date: rows[positions] for date, positions in dates.items()}
+                            for ticker, dates in tickers.items()}
+               for politician, tickers in build_selection_index(transactions.iloc[rows]).items()}
+    updated = {}
+    for politician, tickers in index.items():
+        if politician not in politicians:
+            updated[politician] = tickers
+        elif politician in rebuilt:
+            updated[politician] = rebuilt.pop(politician)
+    updated.update(rebuilt)
+    return updated
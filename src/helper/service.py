@@ -0,0 +1,282 @@
+# Helper functions for a headless query service: relevant_info scoring, transactions and holdings over HTTP
+
+import contextlib
+import io
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pyarrow as pa
+
+from helper import ingest, loader, member_index, result_cache, scoring, timing
+
+logger = logging.getLogger(__name__)
+
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+HOLDINGS = {'ticker': 'holdings_by_ticker', 'industry': 'holdings_by_industry', 'time': 'positions_over_time'}
+
+
+class BadRequest(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+def _optional(params, name, cast):
+    value = params.get(name)
+    if value in (None, '', 'all'):
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise BadRequest(f'{name}: expected {cast.__name__}, got {value!r}')
+
+
+def _required(params, name):
+    if not params.get(name):
+        raise BadRequest(f'missing parameter: {name}')
+    return params[name]
+
+
+class QueryService:
+    """
+    The queries behind the endpoints, over one helper.loader.load_data result. Scored activity is
+    cached per (dataset version, uuid, parameters) in a ResultCache shared by every request thread.
+    Each query reads `self.data` once: refresh replaces it whole, never edits it.
+    """
+
+    def __init__(self, data, cache=None, incoming_dir=ingest.INCOMING_DIR):
+        self.data = data
+        self.cache = cache or result_cache.ResultCache()
+        timing.register_cache('activity', self.cache)
+        self.incoming_dir = incoming_dir
+        # called after a refresh requested over HTTP, to pass it on to the other worker processes
+        self.broadcast = None
+        self._refresh_lock = threading.Lock()
+
+    def politicians(self, params):
+        return {'politicians': list(self.data['selection'])}
+
+    def transactions(self, params):
+        data = self.data
+        politician = _required(params, 'politician')
+        if politician not in data['selection']:
+            raise NotFound(f'unknown politician: {politician}')
+        selection = data['selection'][politician]
+        tickers = [params['ticker']] if params.get('ticker') else list(selection)
+        positions = [rows for ticker in tickers for rows in selection.get(ticker, {}).values()]
+        return data['transactions'].iloc[np.sort(np.concatenate(positions)) if positions else []]
+
+    def holdings(self, params):
+        data = self.data
+        politician = _required(params, 'politician')
+        if politician not in data['selection']:
+            raise NotFound(f'unknown politician: {politician}')
+        by = params.get('by', 'ticker')
+        if by not in HOLDINGS:
+            raise BadRequest(f'by: one of {", ".join(HOLDINGS)}')
+        if by == 'time':
+            return member_index.select(data, HOLDINGS[by], [(politician, _required(params, 'ticker'))])
+        return member_index.select(data, HOLDINGS[by], [politician])
+
+    def activity(self, params):
+        """
+        {table: ranked rows} for one transaction uuid, as relevant_info scores them (through the same
+        scoring.transaction_activity), over `tables` or the tables of one relevant_info `category`.
+        """
+        uuid = _required(params, 'uuid')
+        lookback_days = _optional(params, 'lookback_days', int)
+        top_k = _optional(params, 'top_k', int)
+        if top_k is not None and top_k <= 0:
+            raise BadRequest(f'top_k: expected a positive int, got {top_k}')
+        min_similarity = _optional(params, 'min_similarity', float)
+        if params.get('category'):
+            if params['category'] not in scoring.CATEGORIES:
+                raise BadRequest(f'category: one of {", ".join(scoring.CATEGORIES)}')
+            names = scoring.CATEGORIES[params['category']]
+        else:
+            names = tuple(params['tables'].split(',')) if params.get('tables') else tuple(scoring.ACTIVITY_IDS)
+        unknown = set(names) - set(scoring.ACTIVITY_IDS)
+        if unknown:
+            raise BadRequest(f'unknown tables: {", ".join(sorted(unknown))}')
+        data = self.data
+        key = (data['version'], uuid, lookback_days, top_k, min_similarity, names)
+        with timing.span('service.activity') as span:
+            ranked = self.cache.get(key, lambda: scoring.transaction_activity(data, uuid, lookback_days, top_k, min_similarity, names))
+            if ranked is None:
+                raise NotFound(f'unknown transaction: {uuid}')
+            span.rows = sum(len(rows) for rows in ranked.values())
+        return ranked
+
+    def refresh(self, params):
+        """
+        Fold new deliveries from the incoming directory into the dataset, as local.py's refresh_data
+        does; cached activity of the affected members is dropped, the rest carried over.
+        """
+        with self._refresh_lock:
+            data = self.data
+            updated, members = ingest.ingest_incoming(data, self.incoming_dir)
+            if updated['version'] != data['version']:
+                # before the swap, or results stored for the new version in between would be dropped
+                transactions = updated['transactions']
+                stale = set(transactions['uuid'][transactions['member_id'].isin(list(members))].tolist())
+                self.cache.advance(data['version'], updated['version'], lambda key: key[1] not in stale)
+            self.data = updated
+        return {'version': updated['version'], 'members': sorted(members)}
+
+
+def to_json(result):
+    if isinstance(result, dict):
+        return '{' + ', '.join(f'{json.dumps(name)}: {to_json(value)}' for name, value in result.items()) + '}'
+    if hasattr(result, 'to_json'):
+        return result.to_json(orient='records', date_format='iso')
+    return json.dumps(result)
+
+
+def to_arrow(df):
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    GET /politicians, /transactions?politician=&ticker=, /holdings?politician=&by=ticker|industry|time&ticker=,
+    /activity?uuid=&lookback_days=&top_k=&min_similarity=&tables=|category=, /metrics and /health;
+    POST /refresh folds in new deliveries (answering with the receiving worker's result; the other
+    workers follow in the background, see serve). Frames come back as JSON records, or as an Arrow
+    IPC stream with `format=arrow` (or an Arrow Accept header); /activity in Arrow needs `tables`
+    naming a single table. Unexpected errors are logged and answered with a JSON 500.
+    """
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in separate writes: without this, keep-alive clients wait out delayed ACKs
+    disable_nagle_algorithm = True
+    service = None
+
+    def do_POST(self):
+        # no parameters: the body, if any, is read only to keep the connection usable
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urllib.parse.urlsplit(self.path).path.strip('/') != 'refresh':
+            return self.send(404, 'application/json', json.dumps({'error': f'unknown endpoint: {self.path}'}).encode())
+        try:
+            result = self.service.refresh({})
+        except Exception as error:
+            return self.send_internal_error(error)
+        if self.service.broadcast:
+            self.service.broadcast()
+        self.send(200, 'application/json', to_json(result).encode())
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        endpoint = url.path.strip('/')
+        try:
+            if endpoint == 'health':
+                return self.send(200, 'application/json', json.dumps({'version': self.service.data['version']}).encode())
+            if endpoint == 'metrics':
+                return self.send(200, 'text/plain; version=0.0.4', timing.metrics_text().encode())
+            if endpoint not in ('politicians', 'transactions', 'holdings', 'activity'):
+                raise NotFound(f'unknown endpoint: /{endpoint}')
+            result = getattr(self.service, endpoint)(params)
+            if params.get('format') == 'arrow' or ARROW_TYPE in self.headers.get('Accept', ''):
+                if isinstance(result, dict):
+                    if len(result) > 1 or endpoint == 'politicians':
+                        raise BadRequest('arrow responses hold one table: pass tables=<name>')
+                    result = next(iter(result.values()), None)
+                    if result is None:
+                        return self.send(204, ARROW_TYPE, b'')
+                return self.send(200, ARROW_TYPE, to_arrow(result))
+            return self.send(200, 'application/json', to_json(result).encode())
+        except BadRequest as error:
+            self.send(400, 'application/json', json.dumps({'error': str(error)}).encode())
+        except NotFound as error:
+            self.send(404, 'application/json', json.dumps({'error': str(error)}).encode())
+        except Exception as error:
+            self.send_internal_error(error)
+
+    def send_internal_error(self, error):
+        logger.exception('%s %s failed', self.command, self.path)
+        self.send(500, 'application/json', json.dumps({'error': f'internal error: {type(error).__name__}'}).encode())
+
+    def send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Dataset-Version', self.service.data['version'])
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # access logs only with timing on
+        if timing.ENABLED:
+            super().log_message(format, *args)
+
+
+def make_server(service, host='127.0.0.1', port=8502):
+    handler = type('BoundHandler', (Handler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def _signal(pids):
+    for pid in pids:
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGUSR1)
+
+
+def _refresh_on_signal(service, forward=None):
+    # the refresh runs on its own thread: the handler interrupts the main thread's serve_forever
+    def refresh():
+        service.refresh({})
+        if forward:
+            forward()
+
+    signal.signal(signal.SIGUSR1, lambda signum, frame: threading.Thread(target=refresh, name='refresh', daemon=True).start())
+
+
+def serve(data_dir='data', host='127.0.0.1', port=8502, workers=1):
+    """
+    Load the dataset once and answer requests on a thread per connection. With `workers` > 1 the
+    listening socket is shared by forked processes, which also share the loaded dataset
+    (memory-mapped or copy-on-write) and keep a result cache each. A POST /refresh reaches every
+    worker: the first process passes it on to the others with SIGUSR1, and the others hand theirs
+    to the first. A worker may be refreshed twice that way; the second finds nothing new.
+    """
+    service = QueryService(loader.load_data(data_dir), incoming_dir=os.path.join(data_dir, 'incoming'))
+    server = make_server(service, host, int(port))
+    print(f'serving {data_dir} (version {service.data["version"]}) on http://{host}:{server.server_port}')
+    first, children = os.getpid(), []
+    for _ in range(int(workers) - 1):
+        pid = os.fork()
+        if pid == 0:
+            service.cache = result_cache.ResultCache()
+            timing.register_cache('activity', service.cache)
+            service.broadcast = lambda: _signal([first])
+            _refresh_on_signal(service)
+            break
+        children.append(pid)
+    else:
+        if children:
+            service.broadcast = lambda: _signal(children)
+            _refresh_on_signal(service, service.broadcast)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m helper.service [data_dir] [host] [port] [workers]
+    serve(*sys.argv[1:5])
@@ -0,0 +1,177 @@
+# Helper functions for a dataset published once and memory-mapped by every server process
+
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from helper import dataset, embeddings
+
+# Point this at a tmpfs (e.g. /dev/shm/poliwatch) to publish into shared memory rather than onto disk
+SHARED_DIR = os.environ.get('POLIWATCH_SHARED_DIR')
+
+# Text columns are attached as Arrow-backed strings: pandas' own default from pandas 3, `string[pyarrow]` before
+_DEFAULT_TEXT = pd.Series(['']).dtype
+TEXT_DTYPE = _DEFAULT_TEXT if getattr(_DEFAULT_TEXT, 'storage', None) == 'pyarrow' else pd.StringDtype('pyarrow')
+
+
+# every publish writes a new generation directory; `current` is a symlink to the latest one
+CURRENT = 'current'
+GENERATION_PREFIX = 'generation-'
+
+
+def shared_dir(data_dir='data'):
+    return SHARED_DIR or os.path.join(data_dir, 'shared')
+
+
+def published_dir(data_dir='data'):
+    """
+    The generation directory `current` points at, resolved once (None when nothing has been published).
+    A loader that reads every table and matrix from it sees a single generation, even if a publish
+    swaps in the next one meanwhile.
+    """
+    link = os.path.join(shared_dir(data_dir), CURRENT)
+    return os.path.realpath(link) if os.path.isdir(link) else None
+
+
+def write_table(df, table_dir):
+    """
+    Lay one table out for memory-mapping: numeric, boolean and datetime columns as .npy files,
+    categoricals as .npy codes with their categories in the manifest, and the remaining (text)
+    columns together in one uncompressed Arrow IPC file.
+    """
+    os.makedirs(table_dir, exist_ok=True)
+    manifest, text = [], {}
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(table_dir, f'{i}.npy'), values.cat.codes.to_numpy())
+            manifest.append({'name': column, 'kind': 'category', 'file': f'{i}.npy',
+                             'categories': values.cat.categories.tolist()})
+        elif isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufmM':
+            np.save(os.path.join(table_dir, f'{i}.npy'), values.to_numpy())
+            manifest.append({'name': column, 'kind': 'array', 'file': f'{i}.npy'})
+        else:
+            text[column] = pa.array(values.astype('string'), type=pa.large_string())
+            manifest.append({'name': column, 'kind': 'text', 'file': 'text.arrow'})
+    if text:
+        table = pa.table(text)
+        with pa.OSFile(os.path.join(table_dir, 'text.arrow'), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    with open(os.path.join(table_dir, 'manifest.json'), 'w') as f:
+        json.dump({'rows': len(df), 'columns': manifest}, f)
+
+
+def attach_table(table_dir, columns=None):
+    """
+    DataFrame over the memory-mapped files of a published table, without copying them: every
+    process attached to the same files shares their pages. Arrays are mapped read-only.
+    """
+    with open(os.path.join(table_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    entries = {entry['name']: entry for entry in manifest['columns']}
+    text = None
+    frame = {}
+    for column in (entries if columns is None else columns):
+        entry = entries[column]
+        if entry['kind'] == 'text':
+            if text is None:
+                text = pa.ipc.open_file(pa.memory_map(os.path.join(table_dir, entry['file']))).read_all()
+            frame[column] = pd.Series(text[column], dtype=TEXT_DTYPE)
+            continue
+        values = np.load(os.path.join(table_dir, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, categories=entry['categories'])
+        frame[column] = values
+    return pd.DataFrame(frame, index=pd.RangeIndex(manifest['rows']), copy=False)
+
+
+def is_published(data_dir, name, published=None):
+    published = published or published_dir(data_dir)
+    return published is not None and os.path.exists(os.path.join(published, name, 'manifest.json'))
+
+
+def read_table(data_dir, name, columns=None, embedding=False, published=None):
+    """
+    dataset.read_table, attached to the published copy of the table when there is one
+    (in generation `published`, by default the current one; its matrix is then never parsed).
+    """
+    published = published or published_dir(data_dir)
+    if is_published(data_dir, name, published):
+        df = attach_table(os.path.join(published, name), columns)
+        return (df, None) if embedding else df
+    return dataset.read_table(data_dir, name, columns, embedding)
+
+
+def embedding_dir(data_dir, published=None):
+    """
+    Embedding store to memory-map: the published one when the dataset has been published.
+    """
+    published = published or published_dir(data_dir)
+    return os.path.join(published, 'embeddings') if published else os.path.join(data_dir, 'embeddings')
+
+
+def _point(out_dir, generation):
+    # a symlink is replaced in one rename: readers resolve either the old generation or the new one, never neither
+    link = os.path.join(out_dir, CURRENT)
+    staging = f'{link}.{os.getpid()}'
+    if os.path.lexists(staging):
+        os.remove(staging)
+    os.symlink(os.path.basename(generation), staging)
+    os.replace(staging, link)
+
+
+def _prune(out_dir, keep):
+    # older generations, and the per-table layout of earlier releases; files still mapped by a process stay valid until it unmaps them
+    legacy = set(embeddings.EMBEDDING_TABLES) | {'embeddings'}
+    for entry in os.listdir(out_dir):
+        path = os.path.join(out_dir, entry)
+        if entry in keep or os.path.islink(path):
+            continue
+        if entry.startswith(GENERATION_PREFIX) or entry in legacy or entry.endswith('.staging'):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _link_table(previous, generation, name):
+    # files of a published generation are never rewritten, so an unchanged table is hard-linked rather than copied
+    shutil.copytree(os.path.join(previous, name), os.path.join(generation, name), copy_function=os.link)
+    os.link(os.path.join(previous, 'embeddings', f'{name}.npy'), os.path.join(generation, 'embeddings', f'{name}.npy'))
+
+
+def publish(data_dir='data', out_dir=None, tables=None):
+    """
+    Loader step: write every table (embedding text excluded) and its embedding matrix into a new
+    generation directory under `out_dir`, then point `current` at it. Nothing a server process has
+    mapped is ever rewritten: processes already attached keep the old generation, which is kept
+    until the next publish so that a process resolving it just before the swap can finish attaching.
+    With `tables`, only those are rewritten; the others are linked from the current generation.
+    """
+    out_dir = out_dir or shared_dir(data_dir)
+    link = os.path.join(out_dir, CURRENT)
+    previous = os.path.realpath(link) if os.path.isdir(link) else None
+    generation = os.path.join(out_dir, f'{GENERATION_PREFIX}{time.time_ns()}')
+    os.makedirs(os.path.join(generation, 'embeddings'))
+    for name, stem in embeddings.EMBEDDING_TABLES.items():
+        if tables is not None and name not in tables and previous and os.path.isdir(os.path.join(previous, name)):
+            _link_table(previous, generation, name)
+            continue
+        if not (os.path.exists(os.path.join(data_dir, 'parquet', f'{name}.parquet')) or embeddings.csv_shards(data_dir, stem)):
+            continue
+        df, parsed = dataset.read_table(data_dir, name, embedding=True)
+        store = embeddings.load_embedding_store({name: df}, os.path.join(data_dir, 'embeddings'), {name: parsed})
+        np.save(os.path.join(generation, 'embeddings', f'{name}.npy'), np.ascontiguousarray(store[name]))
+        write_table(df, os.path.join(generation, name))
+        print(f'{name}: {len(df)} rows, {len(df.columns)} columns -> {os.path.join(generation, name)}')
+    _point(out_dir, generation)
+    _prune(out_dir, {os.path.basename(generation)} | ({os.path.basename(previous)} if previous else set()))
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m helper.shared_dataset [data_dir] [out_dir]
+    publish(*sys.argv[1:3])
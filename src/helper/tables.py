@@ -0,0 +1,39 @@
+# Helper functions for paginated result tables
+
+import streamlit as st
+
+PAGE_SIZE = 20
+MAX_CHARS = 120
+
+
+def truncate(series, max_chars=MAX_CHARS):
+    """
+    Text cut to `max_chars` characters, with an ellipsis where something was cut.
+    """
+    text = series.astype(str)
+    return text.where(text.str.len() <= max_chars, text.str.slice(0, max_chars) + '…')
+
+
+def paginated_table(df, key, text_columns=(), column_config=None, page_size=PAGE_SIZE, max_chars=MAX_CHARS):
+    """
+    Render the first pages of an already sorted frame with st.data_editor, with a button to load
+    the next page. Long `text_columns` are truncated; full text is fetched for one row on expand.
+    `key` must be unique per table and per transaction so paging restarts for a new one.
+    """
+    shown = st.session_state.get(f'{key}_shown', page_size)
+    visible = df.iloc[:shown]
+    long_columns = [column for column in text_columns if (visible[column].astype(str).str.len() > max_chars).any()]
+    st.data_editor(visible.assign(**{column: truncate(visible[column], max_chars) for column in long_columns}),
+                   use_container_width=True, hide_index=True, column_config=column_config, key=f'{key}_table')
+
+    if shown < len(df):
+        if st.button(f'Show more ({shown} of {len(df)} shown)', key=f'{key}_more'):
+            st.session_state[f'{key}_shown'] = shown + page_size
+            st.rerun()
+
+    if long_columns:
+        with st.expander('Full text'):
+            row = st.selectbox('Row:', range(len(visible)), key=f'{key}_row',
+                               format_func=lambda i: truncate(visible[long_columns[0]].iloc[[i]], 80).iloc[0])
+            for column in long_columns:
+                st.write(f'**{column}:** {visible[column].iloc[row]}')
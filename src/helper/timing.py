@@ -0,0 +1,262 @@
+# Helper functions for per-stage timing spans: structured logs, aggregated histograms and a debug sidebar
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Off unless POLIWATCH_TIMING is set: span() then hands back one shared no-op object
+ENABLED = os.environ.get('POLIWATCH_TIMING', '') not in ('', '0')
+
+# With timing on, a Streamlit process serves its histograms on http://<host>:<port>/metrics for Prometheus to
+# scrape; give each process its own port
+METRICS_PORT = os.environ.get('POLIWATCH_METRICS_PORT')
+METRICS_HOST = os.environ.get('POLIWATCH_METRICS_HOST', '127.0.0.1')
+
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# spans of the current script run (one list per Streamlit rerun thread), and the enclosing span
+_trace = contextvars.ContextVar('trace', default=None)
+_parent = contextvars.ContextVar('parent', default=None)
+
+_lock = threading.Lock()
+_histograms = {}
+_caches = {}
+_metrics_server = None
+
+# ResultCache.stats() fields exported as counters; the others are gauges
+CACHE_COUNTERS = ('hits', 'misses', 'evictions')
+
+
+class Span:
+    """
+    Times a `with` block as one stage. Set `rows` inside the block to record how many rows it handled.
+    """
+    __slots__ = ('name', 'rows', 'start', 'duration', 'depth', '_token')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        parent = _parent.get()
+        self.depth = 0 if parent is None else parent.depth + 1
+        self._token = _parent.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = time.perf_counter() - self.start
+        _parent.reset(self._token)
+        record(self)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    # assignments are dropped, so instrumented code sets span.rows without checking ENABLED
+    rows = property(lambda self: None, lambda self, value: None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, rows=None):
+    """
+    Context manager timing one stage, e.g. `with timing.span('relevant_info.bills') as s: ...; s.rows = n`.
+    """
+    return Span(name, rows) if ENABLED else _NO_SPAN
+
+
+def observe(name, seconds, rows=None):
+    """
+    Record a stage timed elsewhere (e.g. on a worker thread, where this run's trace is not visible)
+    as a finished span nested under the current one.
+    """
+    if not ENABLED:
+        return
+    finished = Span(name, rows)
+    parent = _parent.get()
+    finished.depth = 0 if parent is None else parent.depth + 1
+    finished.duration = seconds
+    finished.start = time.perf_counter() - seconds
+    record(finished)
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def start_trace():
+    """
+    Begin collecting the spans of this script run for sidebar(); call at the top of the script.
+    The first call in a process also starts the metrics endpoint when POLIWATCH_METRICS_PORT is set.
+    """
+    if ENABLED:
+        _trace.set([])
+        if METRICS_PORT and _metrics_server is None:
+            serve_metrics(int(METRICS_PORT), METRICS_HOST)
+
+
+def trace():
+    return _trace.get() or []
+
+
+def record(finished):
+    """
+    Add a finished span to the current trace, its stage histogram and the structured log.
+    """
+    current = _trace.get()
+    if current is not None:
+        current.append(finished)
+    bucket = next((i for i, bound in enumerate(BUCKETS) if finished.duration <= bound), len(BUCKETS))
+    with _lock:
+        histogram = _histograms.setdefault(finished.name, {'count': 0, 'sum': 0.0, 'max': 0.0, 'rows': 0,
+                                                           'buckets': [0] * (len(BUCKETS) + 1)})
+        histogram['count'] += 1
+        histogram['sum'] += finished.duration
+        histogram['max'] = max(histogram['max'], finished.duration)
+        histogram['rows'] += finished.rows or 0
+        histogram['buckets'][bucket] += 1
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({'stage': finished.name, 'seconds': round(finished.duration, 6), 'rows': finished.rows,
+                                'depth': finished.depth}))
+
+
+def histograms():
+    """
+    {stage: {count, sum, max, rows, buckets}} aggregated over every span of this process.
+    """
+    with _lock:
+        return {name: {**histogram, 'buckets': list(histogram['buckets'])} for name, histogram in _histograms.items()}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def register_cache(name, cache):
+    """
+    Report `cache.stats()` (see helper.result_cache.ResultCache) under `name` in metrics_text and
+    the sidebar. Registering another cache under the same name replaces it.
+    """
+    with _lock:
+        _caches[name] = cache
+
+
+def cache_stats():
+    """
+    {name: stats} of every registered cache.
+    """
+    with _lock:
+        caches = dict(_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+def metrics_text():
+    """
+    The histograms and registered cache stats in Prometheus text exposition format (cumulative
+    buckets), for scraping.
+    """
+    lines = ['# TYPE poliwatch_stage_seconds histogram', '# TYPE poliwatch_stage_rows_total counter']
+    for name, histogram in sorted(histograms().items()):
+        total = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), histogram['buckets']):
+            total += count
+            lines.append(f'poliwatch_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {total}')
+        lines.append(f'poliwatch_stage_seconds_sum{{stage="{name}"}} {histogram["sum"]}')
+        lines.append(f'poliwatch_stage_seconds_count{{stage="{name}"}} {histogram["count"]}')
+        lines.append(f'poliwatch_stage_rows_total{{stage="{name}"}} {histogram["rows"]}')
+    caches = sorted(cache_stats().items())
+    if caches:
+        for field in caches[0][1]:
+            metric = f'poliwatch_cache_{field}_total' if field in CACHE_COUNTERS else f'poliwatch_cache_{field}'
+            lines.append(f'# TYPE {metric} {"counter" if field in CACHE_COUNTERS else "gauge"}')
+            lines.extend(f'{metric}{{cache="{name}"}} {stats[field]}' for name, stats in caches)
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0].rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host='127.0.0.1'):
+    """
+    Serve metrics_text() on http://host:port/metrics from a daemon thread, once per process (later
+    calls return the running server). Returns None when the port is taken, e.g. by another process;
+    that is not retried.
+    """
+    global _metrics_server
+    with _lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as error:
+                logger.warning('metrics endpoint on %s:%s not started: %s', host, port, error)
+                _metrics_server = False
+                return None
+            _metrics_server.daemon_threads = True
+            threading.Thread(target=_metrics_server.serve_forever, name='metrics', daemon=True).start()
+        return _metrics_server or None
+
+
+def sidebar():
+    """
+    Debug sidebar: this run's spans (nested stages indented), the process-wide aggregates and the
+    registered caches.
+    Call at the end of the script, after the instrumented stages have run.
+    """
+    if not ENABLED:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander('Timing', expanded=True):
+        spans = sorted(trace(), key=lambda finished: finished.start)
+        st.dataframe(pd.DataFrame({'Stage': ['\u2003' * finished.depth + finished.name for finished in spans],
+                                   'ms': [finished.duration * 1000 for finished in spans],
+                                   'Rows': [finished.rows for finished in spans]}),
+                     hide_index=True, use_container_width=True)
+        aggregates = histograms()
+        st.dataframe(pd.DataFrame({'Stage': list(aggregates),
+                                   'Count': [histogram['count'] for histogram in aggregates.values()],
+                                   'Mean ms': [histogram['sum'] / histogram['count'] * 1000 for histogram in aggregates.values()],
+                                   'Max ms': [histogram['max'] * 1000 for histogram in aggregates.values()]}),
+                     hide_index=True, use_container_width=True)
+        caches = cache_stats()
+        if caches:
+            st.dataframe(pd.DataFrame({'Cache': list(caches),
+                                       'Entries': [stats['entries'] for stats in caches.values()],
+                                       'MB': [stats['bytes'] / 2 ** 20 for stats in caches.values()],
+                                       'Hit rate': [stats['hit_rate'] for stats in caches.values()],
+                                       'Evictions': [stats['evictions'] for stats in caches.values()]}),
+                         hide_index=True, use_container_width=True)
+        st.download_button('Metrics', metrics_text(), file_name='poliwatch_metrics.txt')
@@ -0,0 +1,147 @@
+# Helper functions for nearest-neighbour search over transaction embeddings
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from helper import embeddings
+
+
+def _top(scores, k):
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind='stable')]
+
+
+class FlatIndex:
+    """
+    Exact cosine search: one matrix-vector product over every stored vector.
+    """
+
+    def __init__(self, vectors):
+        self.vectors = embeddings.normalize_rows(vectors)
+
+    def search(self, query, k=10):
+        """
+        Row ids of the k vectors most similar to `query`, best first, and their cosine scores.
+        """
+        scores = self.vectors @ embeddings.normalize_rows(np.atleast_2d(query))[0]
+        ids = _top(scores, k)
+        return ids, scores[ids]
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate search: vectors are clustered with spherical k-means and a query
+    only scores the members of its `n_probe` closest clusters.
+    """
+
+    def __init__(self, vectors, n_lists=None, n_probe=8, iterations=10, seed=0, block_size=4096):
+        self.vectors = embeddings.normalize_rows(vectors)
+        n = len(self.vectors)
+        n_lists = min(n, n_lists or max(1, int(np.sqrt(n))))
+        self.n_probe = n_probe
+        rng = np.random.default_rng(seed)
+        self.centroids = self.vectors[rng.choice(n, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._assign(block_size)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignment, self.vectors)
+            filled = np.bincount(assignment, minlength=n_lists) > 0
+            self.centroids[filled] = embeddings.normalize_rows(sums[filled])
+        assignment = self._assign(block_size)
+        # list l holds ids[offsets[l]:offsets[l + 1]]
+        self.ids = np.argsort(assignment, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+
+    def _assign(self, block_size):
+        return np.concatenate([np.argmax(self.vectors[start:start + block_size] @ self.centroids.T, axis=1)
+                               for start in range(0, len(self.vectors), block_size)])
+
+    def search(self, query, k=10, n_probe=None):
+        """
+        Approximate row ids of the k vectors most similar to `query`, best first, and their cosine scores.
+        """
+        query = embeddings.normalize_rows(np.atleast_2d(query))[0]
+        lists = _top(self.centroids @ query, n_probe or self.n_probe)
+        candidates = np.concatenate([self.ids[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+        scores = self.vectors[candidates] @ query
+        best = _top(scores, k)
+        return candidates[best], scores[best]
+
+
+INDEX_TYPES = {
+    'flat': FlatIndex,
+    'ivf': IVFIndex,
+}
+
+
+def build_index(vectors, kind='flat', **options):
+    """
+    Build a vector index of the given kind ('flat' or 'ivf') over row vectors.
+    """
+    return INDEX_TYPES[kind](vectors, **options)
+
+
+def benchmark(vectors, queries=None, n_queries=200, k=10, n_probes=(1, 4, 8, 16, 32), seed=0):
+    """
+    Recall@k and mean query latency of the IVF index at several n_probe values, against the exact
+    flat index. Queries should be held out from the index, as related_transactions queries with bill
+    and hearing embeddings: pass them as `queries`, or `n_queries` stored vectors are held out instead
+    (at most all but one). Raises ValueError when that leaves no query to time.
+    """
+    if n_queries < 1:
+        raise ValueError(f'n_queries must be at least 1, got {n_queries}')
+    rng = np.random.default_rng(seed)
+    if queries is None:
+        held_out = np.zeros(len(vectors), dtype=bool)
+        held_out[rng.choice(len(vectors), max(0, min(n_queries, len(vectors) - 1)), replace=False)] = True
+        vectors, queries = vectors[~held_out], vectors[held_out]
+    else:
+        # zero rows are rows without an embedding: nothing to search for
+        queries = queries[np.linalg.norm(queries, axis=1) > 0]
+        queries = queries[rng.choice(len(queries), min(n_queries, len(queries)), replace=False)]
+    n_queries = len(queries)
+    if n_queries == 0:
+        raise ValueError('no queries to benchmark: too few vectors to hold out, or every query row is zero')
+    flat = FlatIndex(vectors)
+    start = time.perf_counter()
+    exact = [set(flat.search(query, k)[0]) for query in queries]
+    results = [{'index': 'flat', 'n_probe': None, 'recall': 1.0,
+                'latency_ms': 1000 * (time.perf_counter() - start) / n_queries}]
+    start = time.perf_counter()
+    ivf = IVFIndex(vectors)
+    build_seconds = time.perf_counter() - start
+    for n_probe in n_probes:
+        start = time.perf_counter()
+        found = [set(ivf.search(query, k, n_probe)[0]) for query in queries]
+        latency = 1000 * (time.perf_counter() - start) / n_queries
+        recall = float(np.mean([len(f & e) / len(e) for f, e in zip(found, exact)]))
+        results.append({'index': 'ivf', 'n_probe': n_probe, 'recall': recall, 'latency_ms': latency,
+                        'build_seconds': build_seconds})
+    return results
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=src python -m helper.vector_index [store_dir | transactions.npy | n_vectors] [dim]
+    source = sys.argv[1] if len(sys.argv) > 1 else '100000'
+    queries = None
+    if os.path.isdir(source):
+        # the transaction matrix, queried with the bill and hearing embeddings related_transactions uses
+        vectors = np.load(os.path.join(source, 'transactions.npy'))
+        queries = np.concatenate([np.load(os.path.join(source, f'{name}.npy')) for name in ('bills', 'hearings')
+                                  if os.path.exists(os.path.join(source, f'{name}.npy'))])
+    elif source.endswith('.npy'):
+        vectors = np.load(source)
+    else:
+        # clustered synthetic embeddings: topic centres plus noise
+        rng = np.random.default_rng(0)
+        dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+        centres = rng.standard_normal((256, dim)).astype(np.float32)
+        vectors = centres[rng.integers(0, 256, int(source))] + 0.5 * rng.standard_normal((int(source), dim)).astype(np.float32)
+    for row in benchmark(vectors, queries):
+        print(row)
@@ -1,43 +1,37 @@
+import threading
+
 import pandas as pd
 import streamlit as st
-import altair as alt
-import numpy as np
-import re
-import ast
-from sklearn.metrics.pairwise import cosine_similarity
-from pygwalker.api.streamlit import StreamlitRenderer, init_streamlit_comm
-from PIL import Image, ImageFile
-import streamlit_book as stb
+from helper import explore, ingest, loader, member_index, result_cache, scoring, tables, timing, vector_index
 
 
-def clean_array_string(array_string):
-    # Replace newlines and multiple spaces with a single space
-    cleaned_string = re.sub(r'\s+', ' ', array_string)
-    # Add a comma after each number except the last one
-    cleaned_string_with_commas = re.sub(r'([-\d.e]+)(?=\s)', r'\1,', cleaned_string)
-    return cleaned_string_with_commas
+@st.cache_resource
+def load_data():
+    # Tables published with `python -m helper.shared_dataset` are memory-mapped, so server processes share one copy.
+    # cache_resource hands every session the same object instead of an unpickled copy each; its tables are
+    # never modified, refresh_data swaps in new ones (see get_data_holder).
+    return loader.load_data('data')
 
 
-@st.cache_data
-def load_data():
-    transactions = pd.read_csv('data/transactions_final.csv')
-    committee_assignments = pd.read_csv('data/committee_assignments_final.csv')
-    subcommittee_assignments = pd.read_csv('data/subcommittee_assignments_final.csv')
-    statements = pd.read_csv('data/member_statements_final.csv')
-    travel = pd.read_csv('data/travel_final.csv')
-    related_bills = pd.read_csv('data/related_bills_final.csv')
-    bills = pd.read_csv('data/bills_final.csv')
-    hearings = pd.read_csv('data/committee_hearings_final.csv')
-
-    return {'transactions': transactions,
-            'committee_assignments': committee_assignments,
-            'subcommittee_assignments': subcommittee_assignments,
-            'statements': statements,
-            'travel': travel,
-            'related_bills': related_bills,
-            'bills': bills,
-            'hearings': hearings
-            }
+@st.cache_resource
+def get_data_holder():
+    # The dataset sessions read, behind a single reference: refresh_data replaces it whole, so a run
+    # holds one generation throughout and never sees one half updated
+    return {'data': load_data(), 'lock': threading.Lock()}
+
+
+def current_data():
+    return get_data_holder()['data']
+
+
+# Keyed by dataset name and version (never by hashing the frame on each rerun) and the explore options.
+# The table is the loaded one (`data[name]` of that version), not a second read of it.
+# Aggregations run in this process: the browser gets query results, not the table.
+@st.cache_resource
+def get_pyg_renderer(name, version, _table, include_text=False, row_budget=explore.ROW_BUDGET):
+    frame, info = explore.prepare(_table, include_text, row_budget)
+    return explore.renderer(frame, spec="./gw_config.json"), info
+
 
 st.set_page_config(
     layout="wide",  # Use "wide" layout
@@ -52,10 +46,17 @@ if 'ticker' not in st.session_state:
     st.session_state['ticker'] = ''
 if 'date' not in st.session_state:
     st.session_state['date'] = ''
+if 'relevant_info' not in st.session_state:
+    st.session_state['relevant_info'] = ''
+
 
+def politician_graph(placeholder1_title, placeholder1_body, placeholder2_title, placeholder2_body, data, politician):
+    import altair as alt
 
-def politician_graph(placeholder1_title, placeholder1_body, placeholder2_title, placeholder2_body, transactions, politician):
-    portfolio_value = transactions.groupby('ticker').last().reset_index()
+    with timing.span('politician_graph.select') as span:
+        portfolio_value = member_index.select(data, 'holdings_by_ticker', [politician])
+        industry_bar_chart_data = member_index.select(data, 'holdings_by_industry', [politician])
+        span.rows = len(portfolio_value) + len(industry_bar_chart_data)
 
     bar_chart = alt.Chart(portfolio_value).mark_bar().encode(
         x=alt.X('ticker:N', title='Ticker'),
@@ -73,7 +74,6 @@ def politician_graph(placeholder1_title, placeholder1_body, placeholder2_title,
     ).interactive()
     
 
-    industry_bar_chart_data = portfolio_value.fillna("No Industry").groupby('industry').sum('cumulative_amount').reset_index()
     industry_bar_chart = alt.Chart(industry_bar_chart_data).mark_bar().encode(
         x=alt.X('industry', title='Industry'),
         y=alt.Y('cumulative_amount', title='Amount ($)'),
@@ -86,21 +86,26 @@ def politician_graph(placeholder1_title, placeholder1_body, placeholder2_title,
             alt.Tooltip('cumulative_amount', title='Amount ($)')]
     ).interactive()
 
-    placeholder1_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s Estimated Net Holdings At Present by Ticker</h1>", unsafe_allow_html=True)
-    placeholder1_body.altair_chart(bar_chart, use_container_width=True)
-    placeholder2_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s Estimated Net Holdings At Present by Industry</h1>", unsafe_allow_html=True)
-    placeholder2_body.altair_chart(industry_bar_chart, use_container_width=True)
+    with timing.span('politician_graph.render'):
+        placeholder1_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s Estimated Net Holdings At Present by Ticker</h1>", unsafe_allow_html=True)
+        placeholder1_body.altair_chart(bar_chart, use_container_width=True)
+        placeholder2_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s Estimated Net Holdings At Present by Industry</h1>", unsafe_allow_html=True)
+        placeholder2_body.altair_chart(industry_bar_chart, use_container_width=True)
 
 
-def politician_ticker_graph(placeholder3_title, placeholder3_body, transactions, politician, ticker):
-    transactions = transactions[transactions['ticker'] == ticker].groupby('combined_transaction_date').last().reset_index()
+def politician_ticker_graph(placeholder3_title, placeholder3_body, data, politician, ticker):
+    import altair as alt
 
-    line_chart = alt.Chart(transactions).mark_line(color='#AED6E8').encode(
+    with timing.span('politician_ticker_graph.select') as span:
+        positions = member_index.select(data, 'positions_over_time', [(politician, ticker)])
+        span.rows = len(positions)
+
+    line_chart = alt.Chart(positions).mark_line(color='#AED6E8').encode(
         x=alt.X('combined_transaction_date:T', title='Date'),
         y=alt.Y('cumulative_amount:Q', title='Position ($)')
     ).interactive()
 
-    circle_chart = alt.Chart(transactions).mark_circle(size=75, color='#F9ACB1').encode(
+    circle_chart = alt.Chart(positions).mark_circle(size=75, color='#F9ACB1').encode(
         x=alt.X('combined_transaction_date:T', title='Date'),
         y=alt.Y('cumulative_amount:Q', title='Position ($)'),
         tooltip=[
@@ -110,160 +115,174 @@ def politician_ticker_graph(placeholder3_title, placeholder3_body, transactions,
 
     line = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(strokeDash=[2, 2], color='white').encode(y='y')
 
-    placeholder3_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s {ticker} Position Over Time</h1>", unsafe_allow_html=True)
-    placeholder3_body.altair_chart(line_chart + circle_chart + line, use_container_width=True)
+    with timing.span('politician_ticker_graph.render'):
+        placeholder3_title.markdown(f"<h1 style='font-size: 20px;'>{politician}'s {ticker} Position Over Time</h1>", unsafe_allow_html=True)
+        placeholder3_body.altair_chart(line_chart + circle_chart + line, use_container_width=True)
 
 
-def cumulative(transactions, politician_selection):
-    filtered = transactions[(transactions['display_name'] == politician_selection) & (transactions['type'] != 'exchange')].sort_values(by=['combined_transaction_date'])
-    filtered['actual_amount'] = filtered.apply(lambda row: row['amount_formatted'] if row['type']=='purchase' else -row['amount_formatted'], axis=1)
-    filtered['cumulative_amount'] = filtered.groupby('ticker')['actual_amount'].cumsum()
-    return filtered
+RELEVANT_INFO_CATEGORIES = list(scoring.CATEGORIES)
 
+# activity table -> (columns relevant_info shows, their labels)
+ACTIVITY_COLUMNS = {
+    'committee_assignments': (['committee_name', 'similarity'], ['Committee Name', 'Similarity']),
+    'subcommittee_assignments': (['subcommittee_name', 'similarity'], ['Subcommittee Name', 'Similarity']),
+    'hearings': (['hearing_date', 'hearing_description', 'similarity'], ['Hearing Date', 'Hearing Description', 'Similarity']),
+    'bills': (['bill_id', 'bill_title', 'bill_intro_date', 'similarity'], ['Bill ID', 'Bill Title', 'Bill Intro Date', 'Similarity']),
+    'related_bills': (['related_bill_id', 'related_bill_title', 'related_bill_introduction_date', 'similarity'],
+                      ['Related Bill ID', 'Related Bill Title', 'Related Bill Intro Date', 'Similarity']),
+    'travel': (['departure_date', 'destination', 'sponsor', 'similarity'], ['Departure Date', 'Destination', 'Sponsor', 'Similarity']),
+    'statements': (['title', 'date', 'type', 'similarity', 'url'], ['Title', 'Date', 'Type', 'Similarity', 'URL']),
+}
 
-def relevant_info(data, politician_selection, politician_id, politician_congress, transaction_uuid):
 
-    committee_assignments = data['committee_assignments']
-    subcommittee_assignments = data['subcommittee_assignments']
-    bills = data['bills']
-    committee_hearings = data['hearings']
-    travel = data['travel']
-    related_bills = data['related_bills']
-    member_statements = data['statements']
-    transaction = data['transactions']
+def labelled(ranked, name):
+    # One table of scoring.category_activity as relevant_info displays it (row positions kept as the index)
+    if ranked is None:
+        return None
+    columns, labels = ACTIVITY_COLUMNS[name]
+    ranked = ranked[columns]
+    ranked.columns = labels
+    return ranked
 
-    st.subheader('')
 
-    transaction_embedding = transaction[transaction['uuid'] == transaction_uuid]['embedding'].values[0]
-    transaction_date = transaction[transaction['uuid'] == transaction_uuid]['combined_transaction_date'].values[0]
-    transaction_embedding = ast.literal_eval(clean_array_string(transaction_embedding))
-    transaction_emb_matrix = np.array(transaction_embedding).reshape(1, -1)
+@st.cache_resource
+def get_result_cache():
+    cache = result_cache.ResultCache()
+    timing.register_cache('relevant_activity', cache)
+    return cache
 
-    assignments_hearings_tab, bills_tab, travel_statements_tab = st.tabs(["Assignments & Hearings", "Bills", "Travel & Statements"])
+
+def relevant_activity(data, transaction_uuid, category, lookback_days=None, top_k=None, min_similarity=None):
+    # Ranked activity tables of one relevant_info category, scored once per dataset version and shared by all sessions
+    key = (data['version'], transaction_uuid, category, lookback_days, top_k, min_similarity)
+    return get_result_cache().get(key, lambda: {name: labelled(ranked, name) for name, ranked in scoring.category_activity(
+        data, transaction_uuid, category, lookback_days, top_k, min_similarity).items()})
+
+
+def relevant_info(data, politician_selection, transaction_uuid, lookback_days=None, top_k=None, min_similarity=None):
+
+    st.subheader('')
+
+    # A radio rather than st.tabs: tab bodies all run on every rerun, this computes only the category on screen
+    category = st.radio('Category:', RELEVANT_INFO_CATEGORIES, horizontal=True, key=f'{transaction_uuid}_category', label_visibility='collapsed')
+    # scoring spans nest under relevant_info.activity; whatever they leave of it is candidate filtering (or a cache hit)
+    with timing.span('relevant_info.activity') as span:
+        activity = relevant_activity(data, transaction_uuid, category, lookback_days, top_k, min_similarity)
+        span.rows = sum(len(ranked) for ranked in activity.values() if ranked is not None)
     similarity = 'Cosine similarity correlation score between chosen **transaction** and **congressional activity**'
-    with assignments_hearings_tab:
-        col1,col2 = st.columns([0.35, 0.65])
-        with col1:
-            # Politician Committee Assignments
-            st.write(f'**{politician_selection}\'s Committee Assignments:**')
-            politician_committees = committee_assignments[(committee_assignments['member_id'] == politician_id) & (committee_assignments['congress'] == politician_congress)]
-            if len(politician_committees) == 0:
-                st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant committee assignments</em></div> <br>', unsafe_allow_html=True)
-            else:
-                politician_committees['clean_embeddings'] = politician_committees['embedding'].apply(lambda x: ast.literal_eval(clean_array_string(x)))
-                committee_hearings_emb_matrix = np.vstack(politician_committees['clean_embeddings'].values)
-                politician_committees['similarity'] = cosine_similarity(committee_hearings_emb_matrix,transaction_emb_matrix)
-                politician_committees_df = politician_committees[['committee_name', 'similarity']].sort_values(by=['similarity'], ascending=False)
-                politician_committees_df.columns = ['Committee Name', 'Similarity']
-                st.data_editor(politician_committees_df, use_container_width=True, hide_index=True, column_config={"Similarity": st.column_config.NumberColumn(help=similarity)})
+    similarity_config = {"Similarity": st.column_config.NumberColumn(help=similarity)}
+    with timing.span('relevant_info.render'):
+        if category == "Assignments & Hearings":
+            col1,col2 = st.columns([0.35, 0.65])
+            with col1:
+                # Politician Committee Assignments
+                st.write(f'**{politician_selection}\'s Committee Assignments:**')
+                if activity['committee_assignments'] is None:
+                    st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant committee assignments</em></div> <br>', unsafe_allow_html=True)
+                else:
+                    tables.paginated_table(activity['committee_assignments'], f'{transaction_uuid}_committees', text_columns=['Committee Name'], column_config=similarity_config)
         
-            # Politician Subcommittee Assignments
-            st.write(f'**{politician_selection}\'s Subcommittee Assignments:**')
-            politician_subcommittees = subcommittee_assignments[(subcommittee_assignments['member_id'] == politician_id) & (subcommittee_assignments['congress'] == politician_congress)]
-            if len(politician_subcommittees) == 0:
-                st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant subcommittee assignments</em></div> <br>', unsafe_allow_html=True)
+                # Politician Subcommittee Assignments
+                st.write(f'**{politician_selection}\'s Subcommittee Assignments:**')
+                if activity['subcommittee_assignments'] is None:
+                    st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant subcommittee assignments</em></div> <br>', unsafe_allow_html=True)
+                else:
+                    tables.paginated_table(activity['subcommittee_assignments'], f'{transaction_uuid}_subcommittees', text_columns=['Subcommittee Name'], column_config=similarity_config)
+            with col2:
+                # Politician Hearings
+                st.write(f'**{politician_selection}\'s Hearings:**')
+                if activity['hearings'] is None:
+                    st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant hearings</em></div> <br>', unsafe_allow_html=True)
+                else:
+                    tables.paginated_table(activity['hearings'], f'{transaction_uuid}_hearings', text_columns=['Hearing Description'], column_config=similarity_config)
+
+        elif category == "Bills":
+            # Politician Bills
+            st.write(f'**{politician_selection}\'s Bills:**')
+            filtered_bills_df = activity['bills']
+            if filtered_bills_df is None:
+                st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant bills</em></div> <br>', unsafe_allow_html=True)
             else:
-                politician_subcommittees['clean_embeddings'] = politician_subcommittees['embedding'].apply(lambda x: ast.literal_eval(clean_array_string(x)))
-                subcommittee_hearings_emb_matrix = np.vstack(politician_subcommittees['clean_embeddings'].values)
-                politician_subcommittees['similarity'] = cosine_similarity(subcommittee_hearings_emb_matrix,transaction_emb_matrix)
-                politician_subcommittees_df = politician_subcommittees[['subcommittee_name', 'similarity']].sort_values(by=['similarity'], ascending=False)
-                politician_subcommittees_df.columns = ['Subcommittee Name', 'Similarity']
-                st.data_editor(politician_subcommittees_df, use_container_width=True, hide_index=True, column_config={"Similarity": st.column_config.NumberColumn(help=similarity)})
-        with col2:
-            # Politician Hearings
-            st.write(f'**{politician_selection}\'s Hearings:**')
-            politician_committee_assignments = politician_committees['committee_id'].values
-            filtered_hearings = committee_hearings[(committee_hearings['hearing_committee_id'].isin(politician_committee_assignments))& (committee_hearings['hearing_congress'] == politician_congress) &(committee_hearings['hearing_date'] <= transaction_date)]
-            if len(filtered_hearings) == 0:
-                st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant hearings</em></div> <br>', unsafe_allow_html=True)
+                tables.paginated_table(filtered_bills_df, f'{transaction_uuid}_bills', text_columns=['Bill Title'], column_config=similarity_config)
+                with st.expander(f'Who Else Traded on "{filtered_bills_df["Bill Title"].iloc[0]}"'):
+                    st.data_editor(related_transactions(data, 'bills', filtered_bills_df.index[0]), use_container_width=True, hide_index=True)
+
+            # Politician Related Bills
+            st.write(f'**{politician_selection}\'s Related Bills:**')
+            if activity['related_bills'] is None:
+                st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant related bills</em></div> <br>', unsafe_allow_html=True)
             else:
-                hearing_emb_matrix = np.vstack(filtered_hearings['embedding'].apply(lambda x: ast.literal_eval(clean_array_string(x))).values)
-                transaction_emb_matrix = np.array(transaction_embedding).reshape(1,-1)
-                filtered_hearings['similarity'] = cosine_similarity(hearing_emb_matrix,transaction_emb_matrix)
-                filtered_hearings_df = filtered_hearings[['hearing_date', 'hearing_description', 'similarity']].sort_values(by=['similarity'], ascending=False)
-                filtered_hearings_df.columns = ['Hearing Date', 'Hearing Description', 'Similarity']
-                st.data_editor(filtered_hearings_df, use_container_width=True, hide_index=True, column_config={"Similarity": st.column_config.NumberColumn(help=similarity)}) 
-                
-
-    with bills_tab:
-        # Politician Bills
-        st.write(f'**{politician_selection}\'s Bills:**')
-        filtered_bills = bills[(bills['member_id'] == politician_id) & (bills['bill_intro_date'] <= transaction_date)]
-        if len(filtered_bills) == 0:
-            st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant bills</em></div> <br>', unsafe_allow_html=True)
-        else:
-            bill_emb_matrix = np.vstack(filtered_bills['embedding'].apply(lambda x: ast.literal_eval(clean_array_string(x))).values)
-            transaction_emb_matrix = np.array(transaction_embedding).reshape(1,-1)
-            filtered_bills['similarity'] = cosine_similarity(bill_emb_matrix,transaction_emb_matrix)
-            filtered_bills_df = filtered_bills[['bill_id', 'bill_title', 'bill_intro_date', 'similarity']].sort_values(by=['similarity'], ascending=False)
-            filtered_bills_df.columns = ['Bill ID', 'Bill Title', 'Bill Intro Date', 'Similarity']
-            st.data_editor(filtered_bills_df, use_container_width=True, hide_index=True, column_config={"Similarity": st.column_config.NumberColumn(help=similarity)})
-
-        # Politician Related Bills
-        st.write(f'**{politician_selection}\'s Related Bills:**')
-        filtered_related_bills = related_bills[(related_bills['member_id'] == politician_id) & (related_bills['bill_congress'] == politician_congress) &(related_bills['related_bill_introduction_date'] <= transaction_date)]
-        if len(filtered_related_bills) == 0:
-            st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant related bills</em></div> <br>', unsafe_allow_html=True)
-        else:
-            related_bill_emb_matrix = np.vstack(filtered_related_bills['embedding'].apply(lambda x: ast.literal_eval(clean_array_string(x))).values)
-            transaction_emb_matrix = np.array(transaction_embedding).reshape(1,-1)
-            filtered_related_bills['similarity'] = cosine_similarity(related_bill_emb_matrix,transaction_emb_matrix)
-            filtered_related_bills_df = filtered_related_bills[['related_bill_id', 'related_bill_title', 'related_bill_introduction_date', 'similarity']].sort_values(by=['similarity'], ascending=False)
-            filtered_related_bills_df.columns = ['Related Bill ID', 'Related Bill Title', 'Related Bill Intro Date', 'Similarity']
-            st.data_editor(filtered_related_bills_df, use_container_width=True, hide_index=True, column_config={"Similarity": st.column_config.NumberColumn(help=similarity)})
-
-    with travel_statements_tab:
-        # Politician Travel
-        st.write(f'**{politician_selection}\'s Travel:**')
-        filtered_travel = travel[(travel['member_id'] == politician_id) & (travel['congress'] == politician_congress) &(travel['departure_date'] <= transaction_date)]
-        if len(filtered_travel) == 0:
-            st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant travel</em></div> <br>', unsafe_allow_html=True)
-        else:
-            travel_emb_matrix = np.vstack(filtered_travel['embedding'].apply(lambda x: ast.literal_eval(clean_array_string(x))).values)
-            transaction_emb_matrix = np.array(transaction_embedding).reshape(1,-1)
-            filtered_travel['similarity'] = cosine_similarity(travel_emb_matrix,transaction_emb_matrix)
-            filtered_travel_df = filtered_travel[['departure_date', 'destination', 'sponsor', 'similarity']].sort_values(by=['similarity'], ascending=False)
-            filtered_travel_df.columns = ['Departure Date', 'Destination', 'Sponsor', 'Similarity']
-            st.data_editor(filtered_travel_df, use_container_width=True, hide_index=True, column_config={"Similarity": st.column_config.NumberColumn(help=similarity)})
-
-        # Politician Statements
-        st.write(f'**{politician_selection}\'s Statements:**')
-        filtered_statements = member_statements[(member_statements['member_id'] == politician_id) & (member_statements['congress'] == politician_congress) &(member_statements['date'] <= transaction_date)]
-        if len(filtered_statements) == 0:
-            st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant statements</em></div> <br>', unsafe_allow_html=True)
+                tables.paginated_table(activity['related_bills'], f'{transaction_uuid}_related_bills', text_columns=['Related Bill Title'], column_config=similarity_config)
+
         else:
-            statement_emb_matrix = np.vstack(filtered_statements['embedding'].apply(lambda x: ast.literal_eval(clean_array_string(x))).values)
-            transaction_emb_matrix = np.array(transaction_embedding).reshape(1,-1)
-            filtered_statements['similarity'] = cosine_similarity(statement_emb_matrix,transaction_emb_matrix)
-            filtered_statements_df = filtered_statements[['title', 'date', 'type', 'similarity','url']].sort_values(by=['similarity'], ascending=False)
-            filtered_statements_df.columns = ['Title', 'Date', 'Type', 'Similarity','URL']
-            st.data_editor(filtered_statements_df, use_container_width=True, hide_index=True, 
-                           column_config={"Similarity": st.column_config.NumberColumn(help=similarity), 
-                                          "URL": st.column_config.LinkColumn()})
+            # Politician Travel
+            st.write(f'**{politician_selection}\'s Travel:**')
+            if activity['travel'] is None:
+                st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant travel</em></div> <br>', unsafe_allow_html=True)
+            else:
+                tables.paginated_table(activity['travel'], f'{transaction_uuid}_travel', text_columns=['Destination', 'Sponsor'], column_config=similarity_config)
+
+            # Politician Statements
+            st.write(f'**{politician_selection}\'s Statements:**')
+            if activity['statements'] is None:
+                st.write(f'<div style="margin-left: 20px; color: #3366ff;"><em> no relevant statements</em></div> <br>', unsafe_allow_html=True)
+            else:
+                tables.paginated_table(activity['statements'], f'{transaction_uuid}_statements', text_columns=['Title'],
+                                       column_config={**similarity_config, "URL": st.column_config.LinkColumn()})
+
+
+def refresh_data():
+    # Fold new deliveries from data/incoming into the loaded dataset; only the affected members' cached results are dropped
+    holder = get_data_holder()
+    with holder['lock']:
+        data = holder['data']
+        updated, members = ingest.ingest_incoming(data)
+        if updated['version'] != data['version']:
+            # before the swap: advance drops every key not at the old version, which would include
+            # results stored for the new one by runs that already picked it up
+            transactions = updated['transactions']
+            stale = set(transactions['uuid'][transactions['member_id'].isin(list(members))].tolist())
+            get_result_cache().advance(data['version'], updated['version'], lambda key: key[1] not in stale)
+            get_transaction_index.clear()
+        holder['data'] = updated
+    return members
+
+
+# keyed by dataset version: a run still holding the previous generation keeps searching its own matrix
+@st.cache_resource
+def get_transaction_index(version, _vectors, kind='flat'):
+    return vector_index.build_index(_vectors, kind)
+
+
+def related_transactions(data, activity_type, activity_row, k=10, kind='flat'):
+    # Transactions by any member closest to one activity (bill, hearing, ...) embedding
+    ids, scores = get_transaction_index(data['version'], data['embeddings']['transactions'], kind).search(data['embeddings'][activity_type][activity_row], k)
+    related = data['transactions'].iloc[ids][['display_name', 'ticker', 'combined_transaction_date', 'type', 'amount']]
+    related.columns = ['Politician', 'Ticker', 'Transaction Date', 'Type', 'Amount']
+    return related.assign(Similarity=scores)
 
 
 def transactions_selection(data):
     transactions = data['transactions']
+    selection = data['selection']
 
     politician, ticker, date, submit = st.columns([0.29, 0.29, 0.29, 0.13])
     with politician:
-        politician_options = transactions['display_name'].dropna().unique().tolist()
+        politician_options = list(selection)
         politician_selection = st.selectbox('(1) Select Politician:', politician_options)
-        filtered_df = transactions[transactions['display_name'] == politician_selection]
         if st.session_state['politician'] != politician_selection:
             st.session_state['politician'] = politician_selection
             st.session_state['submitted'] = False
     with ticker:
-        ticker_options = filtered_df['ticker'].dropna().unique().tolist()
+        ticker_options = list(selection[politician_selection])
         ticker_selection = st.selectbox('(2) Select Transaction Ticker:', ticker_options)
-        filtered_df = filtered_df[filtered_df['ticker'] == ticker_selection]
         if st.session_state['ticker'] != ticker_selection:
             st.session_state['ticker'] = ticker_selection
             st.session_state['submitted'] = False
     with date:
-        transaction_date_options = filtered_df['combined_transaction_date'].dropna().unique().tolist()
-        transaction_date_selection = st.selectbox('(3) Select Transaction Date:', transaction_date_options)
-        filtered_df = filtered_df[filtered_df['combined_transaction_date'] == transaction_date_selection]
+        transaction_date_options = list(selection[politician_selection][ticker_selection])
+        transaction_date_selection = st.selectbox('(3) Select Transaction Date:', transaction_date_options, format_func=lambda d: d.strftime('%Y-%m-%d'))
+        filtered_df = transactions.iloc[selection[politician_selection][ticker_selection][transaction_date_selection]]
         if st.session_state['date'] != transaction_date_selection:
             st.session_state['date'] = transaction_date_selection
             st.session_state['submitted'] = False
@@ -280,9 +299,8 @@ def transactions_selection(data):
     placeholder3_body = st.empty()
 
     if not (st.session_state['submitted'] or submitted):
-        cumulative_df = cumulative(transactions, politician_selection)
-        politician_graph(placeholder1_title, placeholder1_body, placeholder2_title, placeholder2_body, cumulative_df, politician_selection)
-        politician_ticker_graph(placeholder3_title, placeholder3_body, cumulative_df, politician_selection, ticker_selection)
+        politician_graph(placeholder1_title, placeholder1_body, placeholder2_title, placeholder2_body, data, politician_selection)
+        politician_ticker_graph(placeholder3_title, placeholder3_body, data, politician_selection, ticker_selection)
 
     if submitted or st.session_state['submitted']:
         st.session_state.submitted = True
@@ -291,17 +309,31 @@ def transactions_selection(data):
         display_df.columns = ["Congress", "Disclosure Date", "Asset Description", "Industry", "Sector", "Type", "Amount", "State", "PTR Link"]
         st.data_editor(display_df, column_config={"PTR Link": st.column_config.LinkColumn()}, hide_index=True)
 
-        politician_id = filtered_df['member_id'].values[0]
-        politician_congress = filtered_df['congress'].values[0]
         transaction_uuid = filtered_df['uuid'].values[0]
 
+        if data['top_k'] is not None and transaction_uuid in data['top_k'].index:
+            with st.expander('Strongest Related Activity (precomputed)'):
+                top_activity = data['top_k'].loc[[transaction_uuid], ['activity_type', 'activity_id', 'score']]
+                top_activity.columns = ['Activity Type', 'Activity ID', 'Similarity']
+                st.dataframe(top_activity.sort_values(by=['Similarity'], ascending=False), use_container_width=True, hide_index=True)
+
+        lookback_days = st.selectbox('Activity Window Before Transaction:', [None, 30, 90, 180, 365],
+                                     format_func=lambda days: 'All prior activity' if days is None else f'{days} days')
+        top_k = st.selectbox('Matches per Table:', [None, 10, 25, 50], format_func=lambda k: 'All' if k is None else str(k))
+        min_similarity = st.slider('Minimum Similarity:', min_value=0.0, max_value=1.0, value=0.0, step=0.05)
         generate_relevant_info = st.button('Generate Relevant Info')
         if generate_relevant_info:
-                relevant_info(data, politician_selection, politician_id, politician_congress, transaction_uuid)
+            st.session_state['relevant_info'] = transaction_uuid
+        # Stays open across reruns (paging, expanders) until another transaction is picked
+        if st.session_state['relevant_info'] == transaction_uuid:
+                relevant_info(data, politician_selection, transaction_uuid, lookback_days,
+                              top_k, min_similarity or None)
 
 
 def about(data):
 
+    import streamlit_book as stb
+
     stb.set_chapter_config(path='src/book', button="top", button_previous="←",
                         button_next="→",button_refresh="Refresh", display_page_info=False)
 
@@ -318,19 +350,21 @@ def pygwalker(data):
                'Subcommittee Assignments': 'subcommittee_assignments','Statements': 'statements', 'Travel': 'travel',
                 'Related Bills': 'related_bills', 'Bills': 'bills', 'Hearings': 'hearings'}
     selected_dataset = dataset_name[option]
-    dataset = data[selected_dataset].drop(columns=['Unnamed: 0.1', 'Unnamed: 0'])
+    include_text = st.checkbox('Include text columns', key='explore_include_text')
+    row_budget = st.selectbox('Row Budget:', explore.ROW_BUDGETS, index=explore.ROW_BUDGETS.index(explore.ROW_BUDGET),
+                              format_func=lambda rows: 'All rows' if rows is None else f'{rows:,} rows')
+
+    # pygwalker is imported only when this view is opened: most sessions never open it
+    from pygwalker.api.streamlit import init_streamlit_comm
 
     # Establish communication between pygwalker and streamlit
     init_streamlit_comm()
-    
-    # Get an instance of pygwalker's renderer. You should cache this instance to effectively prevent the growth of in-process memory.
-    @st.cache_resource(hash_funcs={StreamlitRenderer: lambda _: None})
-    def get_pyg_renderer(dataset) -> "StreamlitRenderer":
-        # When you need to publish your app to the public, you should set the debug parameter to False to prevent other users from writing to your chart configuration file.
-        return StreamlitRenderer(dataset, spec="./gw_config.json", debug=False)
-    
-    renderer = get_pyg_renderer(dataset)
-    
+
+    renderer, info = get_pyg_renderer(selected_dataset, data['version'], data[selected_dataset], include_text, row_budget)
+    sampled = ' (random sample)' if info['rows'] < info['total'] else ''
+    excluded = f" · text columns left out: {', '.join(info['excluded'])}" if info['excluded'] else ''
+    st.caption(f"{info['rows']:,} of {info['total']:,} rows{sampled}{excluded}")
+
     # Render your data exploration interface. Developers can use it to build charts by drag and drop.
     renderer.render_explore()
    
@@ -351,18 +385,31 @@ def footer():
     )
 
 
+VIEWS = ["About", "Interactive Data Explore", "Trading Activity"]
+
+
 def main():
-    data = load_data()
+    timing.start_trace()
+    data = current_data()
     st.title('PoliWatch :flag-us:')
     st.subheader('U.S. Congressional Securities Transactions')
     
-    about_tab, interactive_data_explore_tab, trading_activity_tab = st.tabs(["About", "Interactive Data Explore", "Trading Activity"])
-    with about_tab:
+    with st.sidebar:
+        if st.button('Load New Filings'):
+            members = refresh_data()
+            data = current_data()
+            st.write(f'{len(members)} members updated')
+
+    # A radio rather than st.tabs: every tab body runs on each rerun, so pygwalker and streamlit_book would be
+    # imported (and the explore frame built) on every session's first load; only the chosen view runs here
+    view = st.radio('View:', VIEWS, index=VIEWS.index("Trading Activity"), horizontal=True, key='view', label_visibility='collapsed')
+    if view == "About":
         about(data)
-    with interactive_data_explore_tab:
+    elif view == "Interactive Data Explore":
         pygwalker(data)
-    with trading_activity_tab:
+    else:
         transactions_selection(data)
+    timing.sidebar()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 import pandas as pd
 import streamlit as st
-from utils import set_db_connection
+from helper import dataset, filtering
 
 # Set page configuration
 st.set_page_config(
@@ -9,12 +9,18 @@ st.set_page_config(
     initial_sidebar_state="auto",  # Automatically determine the initial state of the sidebar
 )
 
-# Set DB Connection
-s3 = set_db_connection()
+
+@st.cache_resource
+def get_s3():
+    # Set DB Connection: once per process rather than on every script run
+    from utils import set_db_connection
+    return set_db_connection()
+
 
 # Load data
+@st.cache_data
 def load_data():
-    bucket = s3.Bucket('mids-capstone')
+    bucket = get_s3().Bucket('mids-capstone')
     transactions_obj = bucket.Object('transactions/transactions.csv').get()
     committee_assignments_obj = bucket.Object('assignments/committee_assignments_of_interest.csv').get()
     subcommittee_assignments_obj = bucket.Object('assignments/subcommittee_assignments_of_interest.csv').get()
@@ -26,55 +32,67 @@ def load_data():
     related_bills_obj = bucket.Object('bills/related_bills.csv').get()
     member_statements_obj = bucket.Object('statements/member_statements.csv').get()
 
-    return {
-        'transactions': pd.read_csv(transactions_obj['Body']),
-        'committee_assignments': pd.read_csv(committee_assignments_obj['Body']),
-        'subcommittee_assignments': pd.read_csv(subcommittee_assignments_obj['Body']),
-        'committees': pd.read_csv(committees_obj['Body']),
-        'subcommittees': pd.read_csv(subcommittees_obj['Body']),
-        'bills': pd.read_csv(bills_obj['Body']),
-        'committee_hearings': pd.read_csv(committee_hearings_obj['Body']),
-        'travel': pd.read_csv(travel_obj['Body']),
-        'related_bills': pd.read_csv(related_bills_obj['Body']),
-        'member_statements': pd.read_csv(member_statements_obj['Body'])
+    data = {
+        'transactions': dataset.typed(pd.read_csv(transactions_obj['Body'], usecols=dataset.usecols()), 'transactions'),
+        'committee_assignments': dataset.typed(pd.read_csv(committee_assignments_obj['Body'], usecols=dataset.usecols()), 'committee_assignments'),
+        'subcommittee_assignments': dataset.typed(pd.read_csv(subcommittee_assignments_obj['Body'], usecols=dataset.usecols()), 'subcommittee_assignments'),
+        'committees': dataset.typed(pd.read_csv(committees_obj['Body'], usecols=dataset.usecols()), 'committees'),
+        'subcommittees': dataset.typed(pd.read_csv(subcommittees_obj['Body'], usecols=dataset.usecols()), 'subcommittees'),
+        'bills': dataset.typed(pd.read_csv(bills_obj['Body'], usecols=dataset.usecols()), 'bills'),
+        'committee_hearings': dataset.typed(pd.read_csv(committee_hearings_obj['Body'], usecols=dataset.usecols()), 'committee_hearings'),
+        'travel': dataset.typed(pd.read_csv(travel_obj['Body'], usecols=dataset.usecols()), 'travel'),
+        'related_bills': dataset.typed(pd.read_csv(related_bills_obj['Body'], usecols=dataset.usecols()), 'related_bills'),
+        'member_statements': dataset.typed(pd.read_csv(member_statements_obj['Body'], usecols=dataset.usecols()), 'member_statements')
     }
+    data['filter_index'] = filtering.build_postings(data['transactions'], ['display_name', 'ticker', 'combined_transaction_date'])
+    return data
+
 
+PAGE_SIZE = 100
 
-def transactions_selection(transactions, committee_assignments, subcommittee_assignments):
+
+def transactions_selection(transactions, committee_assignments, subcommittee_assignments, filter_index):
+    selections = {}
     col1, col2, col3 = st.columns(3)
     with col1:
         # 1. Select a Politician:
-        politician_options = transactions['display_name'].dropna().unique().tolist()
+        politician_options = filtering.options(transactions, filter_index, 'display_name', None)
         politician_selection = st.multiselect('1. Select Politician:', ['All'] + politician_options, default=['All'])
-        if 'All' in politician_selection:
-            filtered_df = transactions.copy()
-        else:
-            filtered_df = transactions[transactions['display_name'].isin(politician_selection)]
+        if 'All' not in politician_selection:
+            selections['display_name'] = politician_selection
     with col2:
         # 2. Select ticker
-        ticker_options = filtered_df['ticker'].dropna().unique().tolist()
+        ticker_options = filtering.options(transactions, filter_index, 'ticker', filtering.resolve(filter_index, selections))
         ticker_selection = st.multiselect('2. Select Transaction Ticker:', ['All'] + ticker_options, default=['All'])
         if 'All' not in ticker_selection:
-            filtered_df = filtered_df[filtered_df['ticker'].isin(ticker_selection)]
+            selections['ticker'] = ticker_selection
     with col3:
         # 3. Select transaction date
-        transaction_date_options = filtered_df['combined_transaction_date'].dropna().unique().tolist()
-        transaction_date_selection = st.multiselect('3. Select Transaction Dates:', ['All'] + transaction_date_options, default=['All'])
+        transaction_date_options = filtering.options(transactions, filter_index, 'combined_transaction_date', filtering.resolve(filter_index, selections))
+        transaction_date_selection = st.multiselect('3. Select Transaction Dates:', ['All'] + transaction_date_options, default=['All'],
+                                                    format_func=lambda d: d if d == 'All' else d.strftime('%Y-%m-%d'))
         if 'All' not in transaction_date_selection:
-            filtered_df = filtered_df[filtered_df['combined_transaction_date'].isin(transaction_date_selection)]
+            selections['combined_transaction_date'] = transaction_date_selection
+
+    # Only the visible page of the filtered transactions is materialised and sent to the browser
+    positions = filtering.resolve(filter_index, selections)
+    total = filtering.count(transactions, positions)
+    pages = max(1, -(-total // PAGE_SIZE))
+    page_number = st.number_input(f'Page (of {pages}):', min_value=1, max_value=pages, value=1) - 1
+    page_df = filtering.page(transactions, positions, page_number, PAGE_SIZE)
 
     # Display filtered transactions:
-    with st.expander(f'Filtered Transactions', expanded=True):
-        st.dataframe(filtered_df)
+    with st.expander(f'Filtered Transactions ({total} rows, showing {page_number * PAGE_SIZE + 1 if total else 0}-{page_number * PAGE_SIZE + len(page_df)})', expanded=True):
+        st.dataframe(page_df)
 
     # Display Transaction Details for the selected politician:
     st.write('Selected Transaction Details:')
-    st.dataframe(filtered_df[['amount', 'asset_description', 'type', 'industry', 'sector']])
+    st.dataframe(page_df[['amount', 'asset_description', 'type', 'industry', 'sector']])
 
     # Extract additional information based on the filtered dataframe:
-    if politician_selection != 'All':
-        politician_id = filtered_df['id'].values[0]
-        politician_congress = filtered_df['congress'].values[0]
+    if politician_selection != 'All' and total > 0:
+        politician_id = page_df['id'].values[0]
+        politician_congress = page_df['congress'].values[0]
         politician_committees = committee_assignments[(committee_assignments['member_id'] == politician_id) & (committee_assignments['congress'] == politician_congress)]['committee_id'].values
         politician_subcommittees = subcommittee_assignments[(subcommittee_assignments['member_id'] == politician_id) & (subcommittee_assignments['congress'] == politician_congress)]['subcommittee_id'].values
 
@@ -88,7 +106,7 @@ def main():
     # load data
     data = load_data()
 
-    transactions_selection(data['transactions'], data['committee_assignments'], data['subcommittee_assignments'])
+    transactions_selection(data['transactions'], data['committee_assignments'], data['subcommittee_assignments'], data['filter_index'])
 
 main()
 
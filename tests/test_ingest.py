@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import synthetic
+from helper import embeddings, holdings, ingest, loader, member_index, selection_index
+
+# table -> column edited on a few delivered rows, so they change in place (None: only new rows)
+EDITS = {
+    'transactions': ('type', 'sale_full'),
+    'bills': ('bill_title', 'Amended title'),
+    'travel': ('sponsor', 'Aspen Institute Amended'),
+    'statements': ('title', 'Corrected statement'),
+    'hearings': None,
+}
+
+# holdings table -> columns identifying its rows
+HOLDINGS_ROW_KEYS = {
+    'holdings_by_ticker': ['display_name', 'ticker'],
+    'holdings_by_industry': ['display_name', 'industry'],
+    'positions_over_time': ['display_name', 'ticker', 'combined_transaction_date'],
+}
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    """
+    A loaded synthetic dataset, a delivery of changed and new rows for several tables, and the
+    result of ingesting it.
+    """
+    data_dir = str(tmp_path_factory.mktemp('data'))
+    incoming_dir = os.path.join(data_dir, 'incoming')
+    os.makedirs(incoming_dir)
+    synthetic.write_dataset(data_dir, dim=8)
+    data = loader.load_data(data_dir)
+    new_rows = synthetic.Generator(dim=8, seed=1)
+    for name, edit in EDITS.items():
+        stem = embeddings.EMBEDDING_TABLES[name]
+        delivered = new_rows.table(name).head(25)
+        if name == 'transactions':
+            # a politician with no earlier transactions
+            delivered.loc[delivered.index[-3:], ['member_id', 'display_name']] = ['Z999999', 'New Member (Synthetic)']
+        if edit is not None:
+            changed = pd.read_csv(os.path.join(data_dir, f'{stem}.csv')).iloc[::97].head(10)
+            changed[edit[0]] = edit[1]
+            delivered = pd.concat([changed, delivered])
+        delivered.to_csv(os.path.join(incoming_dir, f'{stem}_batch.csv'), index=False)
+    updated, members = ingest.ingest_incoming(data, incoming_dir)
+    return data, updated, members, incoming_dir
+
+
+def plain(index):
+    """
+    An index with its position arrays as lists, comparable with ==.
+    """
+    if isinstance(index, np.ndarray):
+        return index.tolist()
+    if isinstance(index, tuple):
+        return tuple(plain(item) for item in index)
+    return {key: plain(value) for key, value in index.items()}
+
+
+def sorted_frame(df, keys):
+    return df.astype(object).sort_values(keys).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('name', list(EDITS))
+def test_ingest_matches_merged_table(dataset, name):
+    data, updated, _, incoming_dir = dataset
+    keys = ingest.NATURAL_KEYS[name]
+    delivered, _ = ingest.read_incoming(ingest.incoming_files(incoming_dir, embeddings.EMBEDDING_TABLES[name]), name,
+                                        list(data[name].columns))
+    expected = pd.concat([data[name].astype(object), delivered[data[name].columns].astype(object)])
+    expected = expected.drop_duplicates(keys, keep='last')
+    pd.testing.assert_frame_equal(sorted_frame(updated[name], keys), sorted_frame(expected, keys))
+    # existing rows keep their position, so their embedding rows and index entries stay valid
+    assert updated[name][keys[0]].iloc[:len(data[name])].tolist() == data[name][keys[0]].tolist()
+    assert len(updated['embeddings'][name]) == len(updated[name])
+    assert not updated[name].equals(data[name])
+
+
+@pytest.mark.parametrize('name', list(EDITS))
+def test_ingest_index_matches_build_index(dataset, name):
+    _, updated, _, _ = dataset
+    rebuilt = member_index.build_index(updated[name], member_index.INDEX_KEYS[name], member_index.DATE_KEYS.get(name))
+    assert plain(updated['index'][name]) == plain(rebuilt)
+
+
+def test_ingest_holdings_match_build_holdings(dataset):
+    _, updated, _, _ = dataset
+    rebuilt = holdings.build_holdings(updated['transactions'])
+    for name, frame in rebuilt.items():
+        keys = HOLDINGS_ROW_KEYS[name]
+        pd.testing.assert_frame_equal(sorted_frame(updated[name], keys), sorted_frame(frame, keys))
+        assert plain(updated['index'][name]) == plain(member_index.build_index(updated[name], member_index.INDEX_KEYS[name]))
+
+
+def test_ingest_selection_matches_build_selection_index(dataset):
+    _, updated, _, _ = dataset
+    assert plain(updated['selection']) == plain(selection_index.build_selection_index(updated['transactions']))
+
+
+def test_ingest_reports_affected_members(dataset):
+    data, updated, members, _ = dataset
+    assert members
+    assert updated['version'] != data['version']
+    assert members <= set(updated['transactions']['member_id']) | set(updated['committee_assignments']['member_id'])
+
+
+def test_ingesting_the_same_batch_again_is_a_noop(dataset):
+    _, updated, _, incoming_dir = dataset
+    again, members = ingest.ingest_incoming(updated, incoming_dir)
+    assert again is updated and members == set()
+    # a redelivery (new mtime) of rows already folded in changes nothing either
+    for path in os.listdir(incoming_dir):
+        os.utime(os.path.join(incoming_dir, path), (0, 1))
+    again, members = ingest.ingest_incoming(updated, incoming_dir)
+    assert members == set()
+    assert again['version'] == updated['version']
+    for name in EDITS:
+        assert again[name] is updated[name]
+        assert again['index'][name] is updated['index'][name]
+    assert again['selection'] is updated['selection']
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import synthetic
+from helper import loader, member_index
+
+WINDOWS = [None, np.timedelta64(30, 'D'), np.timedelta64(365, 'D')]
+
+
+@pytest.fixture(scope='module')
+def data(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('data')
+    synthetic.write_dataset(str(data_dir), dim=8)
+    data = loader.load_data(str(data_dir))
+    # undated rows sort last in the date index and never pass a cutoff
+    for name, column in member_index.DATE_KEYS.items():
+        data[name].loc[data[name].index[::7], column] = pd.NaT
+    data['index'] = member_index.build_indexes(data)
+    return data
+
+
+def mask_filter(df, keys, key, date_column=None, before=None, window=None):
+    """
+    The boolean-mask filter select replaces.
+    """
+    values = key if isinstance(key, tuple) else (key,)
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in zip(keys, values):
+        mask &= (df[column] == value).to_numpy()
+    if before is not None:
+        mask &= (df[date_column] <= before).to_numpy()
+        if window is not None:
+            mask &= (df[date_column] >= before - window).to_numpy()
+    return df[mask]
+
+
+def cutoffs(df, date_column):
+    dates = df[date_column].dropna()
+    return [np.datetime64('NaT'), dates.min() - pd.Timedelta(days=1), dates.median(), dates.max()]
+
+
+@pytest.mark.parametrize('name', list(member_index.INDEX_KEYS))
+def test_select_matches_mask_filter(data, name):
+    df, keys = data[name], member_index.INDEX_KEYS[name]
+    for key in data['index'][name]:
+        pd.testing.assert_frame_equal(member_index.select(data, name, [key]), mask_filter(df, keys, key))
+
+
+@pytest.mark.parametrize('name', list(member_index.DATE_KEYS))
+def test_select_matches_mask_filter_before_dates(data, name):
+    df, keys, date_column = data[name], member_index.INDEX_KEYS[name], member_index.DATE_KEYS[name]
+    for key in data['index'][name]:
+        for before in cutoffs(df, date_column):
+            for window in WINDOWS:
+                expected = mask_filter(df, keys, key, date_column, pd.Timestamp(before), window)
+                pd.testing.assert_frame_equal(member_index.select(data, name, [key], before, window), expected)
+
+
+def test_select_several_keys_in_table_order(data):
+    df, keys = data['hearings'], member_index.INDEX_KEYS['hearings']
+    picked = list(data['index']['hearings'])[:5]
+    expected = df[pd.MultiIndex.from_frame(df[keys]).isin(picked)]
+    pd.testing.assert_frame_equal(member_index.select(data, 'hearings', picked[::-1] + picked[:1]), expected)
+    assert member_index.select(data, 'hearings', [('missing', 0)]).empty
+
+
+def test_build_indexes_rejects_non_range_index(data):
+    with pytest.raises(ValueError):
+        member_index.build_indexes({'bills': data['bills'].iloc[::-1]})
@@ -0,0 +1,134 @@
+import io
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+from helper import s3_cache, timing
+
+BUCKET = 'mids-capstone'
+
+
+class FakeS3:
+    """
+    get_object over an in-memory bucket, answering a matching If-None-Match with a 304 ClientError as S3 does.
+    """
+
+    def __init__(self, objects):
+        self.objects = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        for key, body in objects.items():
+            self.put(key, body)
+
+    def put(self, key, body):
+        version = self.objects[key][1] + 1 if key in self.objects else 1
+        self.objects[key] = (body, version)
+
+    def etag(self, key):
+        body, version = self.objects[key]
+        return f'"{key}-{version}"'
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        with self.lock:
+            self.requests.append({'Key': Key, 'IfNoneMatch': IfNoneMatch})
+        if Bucket != BUCKET or Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'The specified key does not exist.'}}, 'GetObject')
+        if IfNoneMatch == self.etag(Key):
+            raise ClientError({'Error': {'Code': '304', 'Message': 'Not Modified'}}, 'GetObject')
+        return {'Body': io.BytesIO(self.objects[Key][0]), 'ETag': self.etag(Key)}
+
+
+@pytest.fixture
+def client():
+    return FakeS3({'demo_data/bills_final.csv': b'a,b\n1,2\n', 'demo_data/travel_final.csv': b'a\n3\n'})
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_cached_object_miss_downloads_and_stores_etag(client, tmp_path):
+    path = s3_cache.cached_object(client, BUCKET, 'demo_data/bills_final.csv', tmp_path)
+
+    assert read(path) == b'a,b\n1,2\n'
+    assert client.requests == [{'Key': 'demo_data/bills_final.csv', 'IfNoneMatch': None}]
+    assert s3_cache.etags(BUCKET, ['demo_data/bills_final.csv'], tmp_path) == {'demo_data/bills_final.csv': '"demo_data/bills_final.csv-1"'}
+
+
+def test_cached_object_hit_revalidates_without_download(client, tmp_path):
+    path = s3_cache.cached_object(client, BUCKET, 'demo_data/bills_final.csv', tmp_path)
+    mtime = (tmp_path / BUCKET / 'demo_data/bills_final.csv').stat().st_mtime_ns
+
+    assert s3_cache.cached_object(client, BUCKET, 'demo_data/bills_final.csv', tmp_path) == path
+    assert client.requests[-1] == {'Key': 'demo_data/bills_final.csv', 'IfNoneMatch': '"demo_data/bills_final.csv-1"'}
+    assert (tmp_path / BUCKET / 'demo_data/bills_final.csv').stat().st_mtime_ns == mtime
+    assert read(path) == b'a,b\n1,2\n'
+
+
+def test_cached_object_stale_copy_is_replaced(client, tmp_path):
+    s3_cache.cached_object(client, BUCKET, 'demo_data/bills_final.csv', tmp_path)
+    client.put('demo_data/bills_final.csv', b'a,b\n1,2\n4,5\n')
+
+    path = s3_cache.cached_object(client, BUCKET, 'demo_data/bills_final.csv', tmp_path)
+
+    assert client.requests[-1]['IfNoneMatch'] == '"demo_data/bills_final.csv-1"'
+    assert read(path) == b'a,b\n1,2\n4,5\n'
+    assert s3_cache.etags(BUCKET, ['demo_data/bills_final.csv'], tmp_path)['demo_data/bills_final.csv'] == '"demo_data/bills_final.csv-2"'
+    assert not list(tmp_path.rglob('*.part'))
+
+
+def test_cached_object_without_etag_downloads_again(client, tmp_path):
+    path = s3_cache.cached_object(client, BUCKET, 'demo_data/bills_final.csv', tmp_path)
+    (tmp_path / BUCKET / 'demo_data/bills_final.csv.etag').unlink()
+
+    assert s3_cache.cached_object(client, BUCKET, 'demo_data/bills_final.csv', tmp_path) == path
+    assert client.requests[-1]['IfNoneMatch'] is None
+
+
+def test_cached_object_other_errors_propagate(client, tmp_path):
+    with pytest.raises(ClientError):
+        s3_cache.cached_object(client, BUCKET, 'demo_data/missing.csv', tmp_path)
+    assert not (tmp_path / BUCKET / 'demo_data/missing.csv').exists()
+
+
+def test_etags_of_unfetched_keys_are_none(client, tmp_path):
+    s3_cache.cached_object(client, BUCKET, 'demo_data/travel_final.csv', tmp_path)
+
+    assert s3_cache.etags(BUCKET, ['demo_data/bills_final.csv', 'demo_data/travel_final.csv'], tmp_path) == {
+        'demo_data/bills_final.csv': None, 'demo_data/travel_final.csv': '"demo_data/travel_final.csv-1"'}
+
+
+def test_load_objects_parses_every_key(client, tmp_path):
+    keys = ['demo_data/bills_final.csv', 'demo_data/travel_final.csv']
+
+    parsed, timings = s3_cache.load_objects(client, BUCKET, keys, lambda key, path: (key, read(path)), tmp_path, max_workers=2)
+
+    assert parsed == {key: (key, client.objects[key][0]) for key in keys}
+    assert {key: timing['bytes'] for key, timing in timings.items()} == {key: len(client.objects[key][0]) for key in keys}
+
+
+def test_load_objects_mixes_hits_and_stale_objects(client, tmp_path):
+    keys = ['demo_data/bills_final.csv', 'demo_data/travel_final.csv']
+    s3_cache.load_objects(client, BUCKET, keys, lambda key, path: None, tmp_path)
+    client.put('demo_data/travel_final.csv', b'a\n3\n6\n')
+    client.requests.clear()
+
+    parsed, _ = s3_cache.load_objects(client, BUCKET, keys, lambda key, path: read(path), tmp_path)
+
+    assert parsed == {'demo_data/bills_final.csv': b'a,b\n1,2\n', 'demo_data/travel_final.csv': b'a\n3\n6\n'}
+    assert sorted(request['IfNoneMatch'] for request in client.requests) == ['"demo_data/bills_final.csv-1"', '"demo_data/travel_final.csv-1"']
+    assert s3_cache.etags(BUCKET, keys, tmp_path) == {'demo_data/bills_final.csv': '"demo_data/bills_final.csv-1"',
+                                                      'demo_data/travel_final.csv': '"demo_data/travel_final.csv-2"'}
+
+
+def test_load_objects_records_timing_spans(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(timing, 'ENABLED', True)
+    timing.reset()
+    keys = ['demo_data/bills_final.csv', 'demo_data/travel_final.csv']
+
+    s3_cache.load_objects(client, BUCKET, keys, lambda key, path: None, tmp_path)
+
+    assert {name for name in timing.histograms()} == {f's3.{stage}.{key}' for stage in ('fetch', 'parse') for key in keys}
+    timing.reset()